@@ -0,0 +1,97 @@
+"""Peak memory / CPU of decoding a large synthetic DTEK worker response.
+
+Запуск: python bench_dtek_parse.py [regions] [queues] [tracked]
+Порівнює старий шлях (resp.json() + json.loads(body)) з payload.decode_body,
+який зберігає розклади лише відстежуваних регіонів.
+"""
+import importlib.util
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+REGIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+QUEUES = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+TRACKED = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+ROUNDS = 5
+
+# payload.py не імпортує Home Assistant — вантажимо напряму за шляхом
+_spec = importlib.util.spec_from_file_location(
+    "svitlo_payload", Path(__file__).parent / "custom_components/svitlo_live/payload.py"
+)
+payload = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(payload)
+
+SLOTS = [f"{h:02d}:{m:02d}" for h in range(24) for m in (0, 30)]
+
+
+def _synthetic_response() -> bytes:
+    random.seed(42)
+    days = ("2026-02-04", "2026-02-05")
+    regions = [
+        {
+            "cpu": f"region-{r}",
+            "name_ua": f"Регіон {r}",
+            "name_en": f"Region {r}",
+            "emergency": False,
+            "schedule": {
+                f"{q // 2 + 1}.{q % 2 + 1}": {day: {s: random.choice((1, 2, 2, 1, 0)) for s in SLOTS} for day in days}
+                for q in range(QUEUES)
+            },
+        }
+        for r in range(REGIONS)
+    ]
+    body = json.dumps({"date_today": days[0], "date_tomorrow": days[1], "regions": regions}, ensure_ascii=False)
+    return json.dumps({"body": body, "updated": "2026-02-04T14:39:23Z"}).encode()
+
+
+def _legacy(raw: bytes) -> dict:
+    envelope = json.loads(raw)
+    return json.loads(envelope["body"])
+
+
+def _current(raw: bytes, wanted: set) -> dict:
+    return payload.decode_body(payload.decode_envelope(raw), wanted)
+
+
+def _filtered_stdlib(raw: bytes, wanted: set) -> dict:
+    return payload._decode_filtered(json.loads(raw)["body"], wanted)
+
+
+def _measure(label: str, func) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    cpu = []
+    for _ in range(ROUNDS):
+        start = time.process_time()
+        func()
+        cpu.append(time.process_time() - start)
+
+    kept = sum(1 for r in result["regions"] if not r.get(payload.PRUNED_KEY))
+    print(
+        f"{label:<30} peak {peak / 2**20:6.1f} MiB  retained {retained / 2**20:6.2f} MiB"
+        f"  cpu {min(cpu) * 1000:6.1f} ms"
+        f"   (traced {elapsed * 1000:.0f} ms, schedules kept: {kept}/{len(result['regions'])})"
+    )
+
+
+raw = _synthetic_response()
+wanted = {f"region-{r}" for r in range(TRACKED)}
+
+print(f"Response: {len(raw) / 2**20:.1f} MiB, {REGIONS} regions x {QUEUES} queues, tracked {TRACKED}")
+print(f"JSON backend: {payload.JSON_BACKEND}")
+_measure("legacy json + json", lambda: _legacy(raw))
+_measure("decode_body (default path)", lambda: _current(raw, wanted))
+_measure("filtered (stdlib, per-region)", lambda: _filtered_stdlib(raw, wanted))
+if payload.JSON_BACKEND != "json":
+    _measure(
+        f"full {payload.JSON_BACKEND} + prune",
+        lambda: payload._decode_pruned(payload.decode_envelope(raw)["body"], wanted),
+    )
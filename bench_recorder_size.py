@@ -0,0 +1,154 @@
+"""Recorder attribute bytes/day of the svitlo entities with vs without UNRECORDED_ATTRIBUTES.
+
+Запуск: python bench_recorder_size.py [entries]
+
+Що вимірюється: серіалізовані (JSON, як у recorder) атрибути сенсора статусу
+та календаря на кожному записі стану, з виключенням const.UNRECORDED_ATTRIBUTES
+і без нього. Recorder зберігає рядок state_attributes лише для нового вмісту
+(дедуплікація за вмістом), тож рахуються байти унікальних наборів атрибутів.
+
+Що моделюється (не вимірюється): послідовність записів стану за добу —
+записи відбуваються лише на переходах графіка і на ревізіях графіка
+(always_update=False), як у координаторі в цьому дереві. Ефекти інших змін
+(масиви графіка поза атрибутами, пропуск повторного парсингу) тут не
+враховуються: порівнюються ті самі атрибути з виключенням і без.
+"""
+import ast
+import hashlib
+import importlib.util
+import json
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+PACKAGE = Path(__file__).parent / "custom_components" / "svitlo_live"
+ENTRIES = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+TZ_KYIV = ZoneInfo("Europe/Kyiv")
+
+
+def _unrecorded_attributes() -> frozenset:
+    """const.UNRECORDED_ATTRIBUTES (const.py imports Home Assistant, so read it via ast if needed)."""
+    try:
+        from custom_components.svitlo_live.const import UNRECORDED_ATTRIBUTES
+    except ImportError:
+        tree = ast.parse((PACKAGE / "const.py").read_text(encoding="utf-8"))
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and any(
+                isinstance(t, ast.Name) and t.id == "UNRECORDED_ATTRIBUTES" for t in node.targets
+            ):
+                return frozenset(ast.literal_eval(node.value.args[0]))
+        raise
+    return UNRECORDED_ATTRIBUTES
+
+
+def _load_schedule():
+    # schedule.py не залежить від Home Assistant
+    spec = importlib.util.spec_from_file_location("svitlo_schedule", PACKAGE / "schedule.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+try:
+    import orjson
+
+    def _dumps(attrs: dict) -> bytes:
+        return orjson.dumps(attrs)
+except ImportError:
+    def _dumps(attrs: dict) -> bytes:
+        return json.dumps(attrs, separators=(",", ":")).encode()
+
+
+UNRECORDED = _unrecorded_attributes()
+schedule = _load_schedule()
+
+DAY = date(2026, 2, 4)
+TOMORROW = DAY + timedelta(days=1)
+ON, OFF = schedule.STATE_ON, schedule.STATE_OFF
+
+# Ревізії графіка протягом доби: (година, сьогодні, завтра)
+REVISIONS = [
+    (0, [ON] * 12 + [OFF] * 8 + [ON] * 14 + [OFF] * 8 + [ON] * 6, []),
+    (9, [ON] * 12 + [OFF] * 10 + [ON] * 12 + [OFF] * 8 + [ON] * 6, []),
+    (18, [ON] * 12 + [OFF] * 10 + [ON] * 12 + [OFF] * 8 + [ON] * 6, [ON] * 16 + [OFF] * 8 + [ON] * 24),
+]
+
+
+def _attributes(now: datetime, today: list, tomorrow: list, version: int, updated: datetime) -> dict:
+    """Attributes of SvitloStatusSensor / SvitloCalendar for one coordinator payload."""
+    days = [(DAY, schedule.DaySchedule(bytes(today)))]
+    if tomorrow:
+        days.append((TOMORROW, schedule.DaySchedule(bytes(tomorrow))))
+    index = schedule.ScheduleIndex.build(days, TZ_KYIV)
+    change = index.next_change(now)
+    return {
+        "region": "kyiv",
+        "queue": "3.1",
+        "now_status": index.state_at(now),
+        "next_change_at": change.astimezone(TZ_KYIV).strftime("%H:%M") if change else None,
+        "today_outage_hours": today.count(OFF) * 0.5,
+        "tomorrow_outage_hours": tomorrow.count(OFF) * 0.5 if tomorrow else None,
+        "longest_outage_hours": schedule.longest_off_hours(*(d for _, d in days)),
+        "schedule_version": f"{version:012x}",
+        "updated": updated.replace(microsecond=0).isoformat(),
+    }
+
+
+def _state_writes() -> list[dict]:
+    """Attribute sets written during one day (transitions + revisions)."""
+    midnight = datetime(2026, 2, 4, tzinfo=TZ_KYIV).astimezone(timezone.utc)
+    moments: list[tuple[datetime, int]] = []
+    for number, (hour, today, _tomorrow) in enumerate(REVISIONS):
+        moments.append((midnight + timedelta(hours=hour), number))
+    for slot in range(1, schedule.SLOTS_PER_DAY):
+        # Переходи за поточною ревізією графіка
+        at = midnight + timedelta(minutes=30 * slot)
+        number = max(n for n, (hour, _, _) in enumerate(REVISIONS) if hour * 2 <= slot)
+        today = REVISIONS[number][1]
+        if today[slot] != today[slot - 1]:
+            moments.append((at, number))
+
+    writes = []
+    for at, number in sorted(moments):
+        hour, today, tomorrow = REVISIONS[number]
+        updated = midnight + timedelta(hours=hour)
+        writes.append(_attributes(at, today, tomorrow, number + 1, updated))
+    return writes
+
+
+def _recorded_bytes(writes: list[dict], exclude: frozenset) -> tuple[int, int]:
+    """(new state_attributes rows, their bytes) for a sequence of attribute sets."""
+    seen: set[bytes] = set()
+    rows = size = 0
+    for attrs in writes:
+        blob = _dumps({k: v for k, v in attrs.items() if k not in exclude})
+        digest = hashlib.sha256(blob).digest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        rows += 1
+        size += len(blob)
+    return rows, size
+
+
+ENTITIES_PER_ENTRY = 2  # status sensor + calendar
+writes = _state_writes()
+rows_all, bytes_all = _recorded_bytes(writes, frozenset())
+rows_excl, bytes_excl = _recorded_bytes(writes, UNRECORDED)
+
+print(f"Entries: {ENTRIES}, entities per entry: {ENTITIES_PER_ENTRY}")
+print(f"UNRECORDED_ATTRIBUTES (from const.py): {', '.join(sorted(UNRECORDED))}")
+print(f"State writes per entity/day (modelled): {len(writes)}")
+print(
+    f"Attribute size per write (measured): without exclusion {len(_dumps(writes[-1]))} B, "
+    f"with exclusion {len(_dumps({k: v for k, v in writes[-1].items() if k not in UNRECORDED}))} B"
+)
+scale = ENTRIES * ENTITIES_PER_ENTRY
+print(f"state_attributes rows/day: without exclusion {rows_all * scale}, with exclusion {rows_excl * scale}")
+print(
+    f"state_attributes bytes/day: without exclusion {bytes_all * scale / 1024:.1f} KiB, "
+    f"with exclusion {bytes_excl * scale / 1024:.1f} KiB "
+    f"({100 * (1 - bytes_excl / bytes_all):.1f}% less)"
+)
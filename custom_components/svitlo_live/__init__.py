@@ -1,5 +1,6 @@
 from __future__ import annotations
 import logging
+import secrets
 import shutil
 from pathlib import Path
 
@@ -15,9 +16,14 @@ from .const import (
     PLATFORMS,
     CONF_REGION,
     CONF_QUEUE,
+    CONF_ICS_TOKEN,
     DEFAULT_SCAN_INTERVAL,
+    QUEUE_ALL,
 )
-from .coordinator import SvitloCoordinator
+from .coordinator import SvitloCoordinator, SvitloRegionCoordinator
+from . import websocket_api
+from .ics import SvitloIcsView
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,6 +31,12 @@ _LOGGER = logging.getLogger(__name__)
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the Svitlo Live component."""
     await hass.async_add_executor_job(_copy_blueprints, hass)
+
+    # Масиви графіка для картки (замість великих атрибутів стану)
+    websocket_api.async_setup(hass)
+    async_setup_services(hass)
+    # ICS-фід календаря відключень для зовнішніх календарів
+    hass.http.register_view(SvitloIcsView())
     
     # Реєстрація статичних ресурсів для Lovelace картки
     www_path = Path(__file__).parent / "www"
@@ -68,7 +80,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         from .api_hub import SvitloApiHub
         hass.data[DOMAIN]["hub"] = SvitloApiHub(hass)
     hub = hass.data[DOMAIN]["hub"]
+    # Відновлюємо кеш з диска (один раз), щоб перший refresh не чекав мережу
+    await hub.async_load()
     
+    # Записи, створені до появи ICS-токена, отримують його при першому запуску
+    if CONF_ICS_TOKEN not in entry.data:
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_ICS_TOKEN: secrets.token_urlsafe(32)}
+        )
+
     # Зчитуємо параметри
     scan_interval = entry.data.get("scan_interval_seconds", DEFAULT_SCAN_INTERVAL)
     region = entry.data[CONF_REGION]
@@ -85,7 +105,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     await _async_cleanup_legacy_items(hass, entry)
 
     # Ініціалізація координатора
-    coordinator = SvitloCoordinator(hass, config, hub)
+    # Запис "всі черги": один координатор на регіон з набором сутностей на кожну чергу
+    coordinator_cls = SvitloRegionCoordinator if queue == QUEUE_ALL else SvitloCoordinator
+    coordinator = coordinator_cls(hass, config, hub)
+    entry.async_on_unload(coordinator.async_unsubscribe)
     await coordinator.async_config_entry_first_refresh()
     
     hass.data[DOMAIN][entry.entry_id] = coordinator
@@ -124,6 +147,14 @@ async def _async_cleanup_legacy_items(hass: HomeAssistant, entry: ConfigEntry) -
     # Формуємо очікуваний ідентифікатор (як він створюється в sensor.py/coordinator)
     # Зазвичай це: svitlo_live_{region}_{queue}
     expected_unique_part = f"{current_region}_{current_queue}"
+    # Запис "всі черги" тримає сутності й девайси всіх черг регіону
+    region_wide = current_queue == QUEUE_ALL
+
+    def _is_current(unique_part: str, exact: bool) -> bool:
+        if region_wide:
+            prefix = f"{current_region}_"
+            return unique_part.startswith(prefix) if exact else f"_{prefix}" in unique_part
+        return unique_part == expected_unique_part if exact else expected_unique_part in unique_part
 
     _LOGGER.debug("Cleanup started. Keeping items for: %s", expected_unique_part)
 
@@ -131,7 +162,7 @@ async def _async_cleanup_legacy_items(hass: HomeAssistant, entry: ConfigEntry) -
     entities = ent_reg.entities.get_entries_for_config_entry_id(entry.entry_id)
     for entity in entities:
         # Якщо в unique_id сутності немає поточної черги -> видаляємо
-        if expected_unique_part not in entity.unique_id:
+        if not _is_current(entity.unique_id, exact=False):
             _LOGGER.debug("Removing orphan entity: %s", entity.entity_id)
             ent_reg.async_remove(entity.entity_id)
 
@@ -143,7 +174,7 @@ async def _async_cleanup_legacy_items(hass: HomeAssistant, entry: ConfigEntry) -
         is_current_device = False
         
         for domain, identifier in device.identifiers:
-            if domain == DOMAIN and identifier == expected_unique_part:
+            if domain == DOMAIN and _is_current(identifier, exact=True):
                 is_current_device = True
                 break
         
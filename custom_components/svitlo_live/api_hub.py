@@ -1,19 +1,61 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
-from datetime import datetime, timedelta
-from typing import Any, Optional, Dict, List
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Optional, Dict, List
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.storage import Store
 from homeassistant.util import dt as dt_util
 
-from .const import OLD_API_URL, DTEK_API_URL, API_REGION_MAP
+from .const import (
+    DOMAIN,
+    CONF_REGION,
+    OLD_API_URL,
+    DTEK_API_URL,
+    API_REGION_MAP,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+    STORAGE_SAVE_DELAY,
+    PARSE_CACHE_SIZE,
+    ADAPTIVE_FAST_INTERVAL,
+    ADAPTIVE_MAX_INTERVAL,
+    ADAPTIVE_BACKOFF_AFTER,
+    ADAPTIVE_PUBLISH_HOURS,
+    FETCH_MAX_ATTEMPTS,
+    FETCH_REQUEST_TIMEOUT,
+    FETCH_DEADLINE,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_COOLDOWN,
+    BREAKER_MAX_COOLDOWN,
+    EXECUTOR_DECODE_THRESHOLD,
+)
+from .circuit_breaker import STATE_HALF_OPEN, CircuitBreaker, jittered_backoff
+from .payload import PRUNED_KEY, decode_body, decode_envelope, json_loads
+from .transfer_stats import TransferStats, accept_encoding, header_bytes
+from .countdown import CountdownScheduler
+from .event_archive import OutageArchive
+from .history_store import ScheduleHistoryStore
+from .schedule import STATE_OFF, STATE_ON, ParsedSchedule, parse_schedule
 
 _LOGGER = logging.getLogger(__name__)
 
+TZ_KYIV = dt_util.get_time_zone("Europe/Kyiv")
+
+# Кодеки стиснення, які вміє розпакувати aiohttp у цьому оточенні
+ACCEPT_ENCODING = accept_encoding()
+
+
+class FetchError(Exception):
+    """Unexpected HTTP response from a Svitlo proxy."""
+
 
 class SvitloApiHub:
     """Centralized hub for fetching data from both Svitlo APIs and providing dynamic catalogs."""
@@ -21,37 +63,213 @@ class SvitloApiHub:
     def __init__(self, hass: HomeAssistant) -> None:
         self.hass = hass
         self._session = async_get_clientsession(hass)
-        self._lock = asyncio.Lock()
+        # Один спільний таймер для сенсорів зворотного відліку всіх записів
+        self.countdown = CountdownScheduler(hass)
+        # Історія ревізій графіків на диску (спільна для всіх записів)
+        self.history = ScheduleHistoryStore(hass)
+        # Архів фактичних відключень по місяцях (для календаря за минулі дні)
+        self.archive = OutageArchive(hass, TZ_KYIV)
+        # In-flight fetch per endpoint URL (single-flight)
+        self._inflight: dict[str, asyncio.Task] = {}
+        # Download accounting per endpoint URL (+ listeners of diagnostic sensors)
+        self._transfer: dict[str, TransferStats] = {
+            url: TransferStats() for url in (OLD_API_URL, DTEK_API_URL)
+        }
+        self._transfer_listeners: list[Callable[[], None]] = []
+        # Circuit breaker per endpoint URL
+        self._breakers: dict[str, CircuitBreaker] = {
+            url: CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN, BREAKER_MAX_COOLDOWN)
+            for url in (OLD_API_URL, DTEK_API_URL)
+        }
         
         # Cache for raw data
         self._data_old: Optional[dict[str, Any]] = None
         self._data_new: Optional[dict[str, Any]] = None
         self._last_fetch_old: Optional[datetime] = None
         self._last_fetch_new: Optional[datetime] = None
+        # Bumped only when a payload actually changes (drives memoized views)
+        self._version_old = 0
+        self._version_new = 0
+        # cpu -> region object, rebuilt once per payload version
+        self._regions_old: Dict[str, Dict[str, Any]] = {}
+        self._regions_new: Dict[str, Dict[str, Any]] = {}
+        # Що з payload потрапляє в каталог (id, назви, черги) і лічильники його змін:
+        # нова версія payload (змінився графік) каталог не інвалідує
+        self._catalog_sig_old: Optional[tuple] = None
+        self._catalog_sig_new: Optional[tuple] = None
+        self._catalog_rev_old = 0
+        self._catalog_rev_new = 0
+
+        # Memoized merged regions catalog, keyed by catalog_version
+        self._catalog: List[Dict[str, Any]] = []
+        self._catalog_index: Dict[str, Dict[str, Any]] = {}
+        self._catalog_key: Optional[tuple[int, int]] = None
+
+        # Push updates: subscribers (interval, tracked cpu) and one poll timer per endpoint URL
+        self._subscribers: dict[str, dict[Callable[[], None], tuple[timedelta, Optional[str]]]] = {}
+        self._refresh_timers: dict[str, CALLBACK_TYPE] = {}
+        # Adaptive polling state per URL
+        self._last_poll: dict[str, datetime] = {}
+        self._unchanged_streak: dict[str, int] = {}
+        self._poll_intervals: dict[str, timedelta] = {}
+        self._poll_reasons: dict[str, str] = {}
+
+        # LRU cache of parsed schedules shared by coordinators
+        self._parse_cache: OrderedDict[tuple, ParsedSchedule] = OrderedDict()
         
         # HTTP Caching tags
         self._etags: dict[str, str] = {}
         self._last_modified: dict[str, str] = {}
+        # URLs whose next fetch must skip validators (need a full, unfiltered 200)
+        self._force_full: set[str] = set()
+
+        # Persistent copy of payloads + validators for warm start after restart
+        self._store: Store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._load_task: Optional[asyncio.Task] = None
         
         self._cache_ttl = timedelta(seconds=600)  # 10 minutes
+        # Stale-while-revalidate: після _cache_ttl віддаємо старі дані одразу
+        # і оновлюємо у фоні, але не довше ніж _stale_ttl (hard expiry).
+        self._stale_ttl = timedelta(hours=6)
+
+        # Cache counters (exposed in diagnostics)
+        self._stats: dict[str, int] = {
+            "fresh_hits": 0,
+            "stale_served": 0,
+            "background_refreshes": 0,
+            "blocking_fetches": 0,
+            "parse_cache_hits": 0,
+            "parse_cache_misses": 0,
+        }
+        # Час, який важка робота блокувала event loop (ms), і кількість задач в executor
+        self._payload_sizes: dict[str, int] = {}
+        self._loop_blocking: dict[str, dict[str, float]] = {}
+        self._executor_jobs: dict[str, int] = {}
+
+    async def async_load(self) -> None:
+        """Hydrate cached payloads, validators, history and archive from storage (once per hub)."""
+        if self._load_task is None:
+            self._load_task = self.hass.async_create_task(self._async_load_store())
+        await asyncio.shield(self._load_task)
+        await self.history.async_load()
+        await self.archive.async_load()
+
+    async def _async_load_store(self) -> None:
+        try:
+            stored = await self._store.async_load()
+        except Exception as e:
+            _LOGGER.warning("Failed to load Svitlo hub cache: %s", e)
+            return
+        if not isinstance(stored, dict):
+            return
+
+        def _restore(key: str) -> tuple[Optional[dict[str, Any]], Optional[datetime]]:
+            item = stored.get(key) or {}
+            data = item.get("data")
+            fetched_at = dt_util.parse_datetime(item.get("fetched_at") or "")
+            if not isinstance(data, dict) or fetched_at is None:
+                return None, None
+            return data, fetched_at
+
+        # Не перетираємо дані, якщо мережевий запит встиг завершитись раніше
+        for is_new, key in ((False, "old"), (True, "new")):
+            current = self._data_new if is_new else self._data_old
+            data, fetched_at = _restore(key)
+            if current is None and data is not None:
+                self._set_payload(is_new, data, fetched_at)
+        for url, etag in (stored.get("etags") or {}).items():
+            self._etags.setdefault(url, etag)
+        for url, last_mod in (stored.get("last_modified") or {}).items():
+            self._last_modified.setdefault(url, last_mod)
+
+        _LOGGER.debug(
+            "Hub cache restored: old=%s, new=%s",
+            self._last_fetch_old, self._last_fetch_new,
+        )
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _data_to_store(self) -> dict[str, Any]:
+        def _dump(data: Optional[dict[str, Any]], fetched_at: Optional[datetime]) -> Optional[dict[str, Any]]:
+            if not data or not fetched_at:
+                return None
+            return {"data": data, "fetched_at": fetched_at.isoformat()}
+
+        return {
+            "old": _dump(self._data_old, self._last_fetch_old),
+            "new": _dump(self._data_new, self._last_fetch_new),
+            "etags": self._etags,
+            "last_modified": self._last_modified,
+        }
+
+    @property
+    def catalog_version(self) -> tuple[int, int]:
+        """Version of the regions catalog; changes only when region ids, names or queues change."""
+        return (self._catalog_rev_old, self._catalog_rev_new)
 
     async def get_regions_catalog(self) -> List[Dict[str, Any]]:
         """Fetch all regions from both APIs and return a unified list."""
-        old_data = await self.ensure_data(is_new=False)
-        new_data = await self.ensure_data(is_new=True)
-
-        # --- DEBUG LOGGING ---
-        if new_data:
-            regions_new = new_data.get("regions", [])
-            _LOGGER.info(
-                "New API fetched %d regions. IDs: %s", 
-                len(regions_new),
-                [r.get("cpu") for r in regions_new]
-            )
+        await self._async_ensure_catalog()
+        return self._catalog
+
+    async def get_regions_index(self) -> Dict[str, Dict[str, Any]]:
+        """Same as get_regions_catalog(), but keyed by region id for O(1) lookups."""
+        await self._async_ensure_catalog()
+        return self._catalog_index
+
+    def get_cached_regions_index(self) -> Dict[str, Dict[str, Any]]:
+        """Regions index built from already cached payloads, without any network I/O."""
+        self._ensure_catalog()
+        return self._catalog_index
+
+    async def _async_ensure_catalog(self) -> None:
+        await self.ensure_data(is_new=False)
+        await self.ensure_data(is_new=True)
+        key = self.catalog_version
+        if self._catalog_key == key:
+            return
+        if sum(self._payload_sizes.values()) < EXECUTOR_DECODE_THRESHOLD:
+            self._ensure_catalog()
+            return
+
+        self._executor_jobs["catalog"] = self._executor_jobs.get("catalog", 0) + 1
+        catalog = await self.hass.async_add_executor_job(
+            self._build_catalog, self._data_old or {}, self._data_new or {}
+        )
+        # Поки будувався каталог, payload міг змінитися — тоді будуємо наново
+        if self.catalog_version == key:
+            self._apply_catalog(catalog)
         else:
+            self._ensure_catalog()
+
+    def _ensure_catalog(self) -> None:
+        # Каталог перебудовується лише коли змінився склад регіонів/черг (рідко)
+        if self._catalog_key == self.catalog_version:
+            return
+
+        start = time.perf_counter()
+        catalog = self._build_catalog(self._data_old or {}, self._data_new or {})
+        self._record_loop_blocking("catalog", time.perf_counter() - start)
+        self._apply_catalog(catalog)
+
+    def _apply_catalog(self, catalog: List[Dict[str, Any]]) -> None:
+        if not self._data_new:
             _LOGGER.warning("New API data is empty or None")
-        # ---------------------
 
+        self._catalog = catalog
+        self._catalog_index = {r["id"]: r for r in catalog}
+        self._catalog_key = self.catalog_version
+        _LOGGER.debug(
+            "Regions catalog rebuilt (version %s): %d regions",
+            self._catalog_key, len(catalog),
+        )
+
+    @staticmethod
+    def _build_catalog(old_data: dict[str, Any], new_data: dict[str, Any]) -> List[Dict[str, Any]]:
+        """Merge regions of both APIs into one list sorted by name."""
         merged_regions = {}
 
         def _normalize_name(name: str, slug: str) -> str:
@@ -69,7 +287,7 @@ class SvitloApiHub:
                 "id": cpu,
                 "name": _normalize_name(raw_name, cpu),
                 "is_new_api": True,
-                "queues": list(r.get("schedule", {}).keys())
+                "queues": list((r.get("schedule") or {}).keys())
             }
 
         # Parse Old API (fallback or unique regions)
@@ -97,98 +315,604 @@ class SvitloApiHub:
 
         return sorted(merged_regions.values(), key=lambda x: x["name"])
 
-    async def ensure_data(self, is_new: bool) -> dict[str, Any]:
-        """Ensure we have fresh data for the specified API."""
+    def _set_payload(
+        self,
+        is_new: bool,
+        data: dict[str, Any],
+        fetched_at: datetime,
+        regions: Optional[Dict[str, Dict[str, Any]]] = None,
+        changed: Optional[bool] = None,
+        signature: Optional[tuple] = None,
+    ) -> bool:
+        """Store a parsed payload; bump its version only if the content changed.
+
+        `regions`/`changed`/`signature` можуть бути пораховані заздалегідь (в executor).
+        """
+        if changed is None:
+            changed = data != (self._data_new if is_new else self._data_old)
+        if changed and regions is None:
+            regions = self._index_regions(data)
+        if changed and signature is None:
+            signature = self._catalog_signature(data)
+        if is_new:
+            if changed:
+                self._version_new += 1
+                self._regions_new = regions
+                if signature != self._catalog_sig_new:
+                    self._catalog_sig_new = signature
+                    self._catalog_rev_new += 1
+            self._data_new = data
+            self._last_fetch_new = fetched_at
+        else:
+            if changed:
+                self._version_old += 1
+                self._regions_old = regions
+                if signature != self._catalog_sig_old:
+                    self._catalog_sig_old = signature
+                    self._catalog_rev_old += 1
+            self._data_old = data
+            self._last_fetch_old = fetched_at
+
+        if changed:
+            self._async_notify(is_new)
+        return changed
+
+    # ---- Push-оновлення координаторів ----
+
+    def get_cached_data(self, is_new: bool) -> dict[str, Any]:
+        """Last payload of the API without any network I/O."""
+        return (self._data_new if is_new else self._data_old) or {}
+
+    @callback
+    def async_subscribe(
+        self,
+        is_new: bool,
+        update_callback: Callable[[], None],
+        interval: timedelta,
+        cpu: Optional[str] = None,
+    ) -> CALLBACK_TYPE:
+        """Subscribe to new payload versions of one API.
+
+        Хаб сам опитує кожен endpoint (один таймер на URL) і викликає
+        update_callback лише коли приходить нова версія payload. `cpu` —
+        регіон підписника, за яким адаптується частота опитування.
+        """
+        url = DTEK_API_URL if is_new else OLD_API_URL
+        self._subscribers.setdefault(url, {})[update_callback] = (interval, cpu)
+        self._async_schedule_poll(is_new, url)
+
+        @callback
+        def _unsubscribe() -> None:
+            self._subscribers.get(url, {}).pop(update_callback, None)
+            self._async_schedule_poll(is_new, url)
+
+        return _unsubscribe
+
+    def _tracked_regions(self, url: str) -> Optional[set[str]]:
+        """Regions whose schedules must be kept from the DTEK payload (None = all).
+
+        Окрім регіонів підписників — регіони всіх записів інтеграції, навіть ще
+        не підписаних (після рестарту записи налаштовуються по черзі), щоб
+        перший же запит не обрізав їхні розклади.
+        """
+        subscriptions = self._subscribers.get(url)
+        if not subscriptions or any(cpu is None for _, cpu in subscriptions.values()):
+            return None
+        wanted = {cpu for _, cpu in subscriptions.values()}
+        for entry in self.hass.config_entries.async_entries(DOMAIN):
+            if region := entry.data.get(CONF_REGION):
+                wanted.update((region, API_REGION_MAP.get(region, region)))
+        return wanted
+
+    def is_region_pruned(self, is_new: bool, cpu: str) -> bool:
+        """True if the cached payload holds only queue names (no days) for `cpu`."""
+        region = self.get_region(is_new, cpu)
+        return bool(region and region.get(PRUNED_KEY))
+
+    @callback
+    def _async_notify(self, is_new: bool) -> None:
+        url = DTEK_API_URL if is_new else OLD_API_URL
+        for update_callback in list(self._subscribers.get(url, {})):
+            # Помилка одного координатора не має зупиняти розсилку іншим
+            try:
+                update_callback()
+            except Exception:
+                _LOGGER.exception("Error in %s subscriber update", url)
+
+    # ---- Адаптивне опитування ----
+
+    @callback
+    def _async_schedule_poll(self, is_new: bool, url: str) -> None:
+        """(Re)arm the single poll timer of `url` using the current effective interval."""
+        if unsub := self._refresh_timers.pop(url, None):
+            unsub()
+        if not self._subscribers.get(url):
+            self._poll_intervals.pop(url, None)
+            self._poll_reasons.pop(url, None)
+            return
+
+        interval, reason = self._effective_interval(is_new, url)
+        if self._poll_intervals.get(url) != interval:
+            _LOGGER.debug("Polling %s every %ss (%s)", url, int(interval.total_seconds()), reason)
+        self._poll_intervals[url] = interval
+        self._poll_reasons[url] = reason
+
+        # Запит уже йде — таймер переозброїться по його завершенню
+        if url in self._inflight:
+            return
+
+        now = dt_util.utcnow()
+        last = self._last_poll.get(url)
+        when = max(now, last + interval) if last else now + interval
+
+        @callback
+        def _poll(_now: datetime) -> None:
+            self._refresh_timers.pop(url, None)
+            # Примусовий (умовний) запит, незалежно від TTL кешу
+            self._async_start_fetch(is_new, url)
+
+        self._refresh_timers[url] = async_track_point_in_utc_time(self.hass, _poll, when)
+
+    def _effective_interval(self, is_new: bool, url: str) -> tuple[timedelta, str]:
+        """Polling interval for `url` and the reason it was chosen.
+
+        - аварійні відключення в будь-якому відстежуваному регіоні → швидко;
+        - ввечері, поки графіка на завтра немає → швидко;
+        - кілька незмінних відповідей поспіль → експоненційний backoff до стелі;
+        - інакше → найменший scan_interval підписників.
+        """
+        subscriptions = self._subscribers.get(url, {}).values()
+        base = min(interval for interval, _ in subscriptions)
+        fast = min(base, timedelta(seconds=ADAPTIVE_FAST_INTERVAL))
+        regions = [
+            region
+            for cpu in {cpu for _, cpu in subscriptions if cpu}
+            if (region := self.get_region(is_new, cpu))
+        ]
+
+        if any(region.get("emergency") for region in regions):
+            return fast, "emergency"
+
+        start_hour, end_hour = ADAPTIVE_PUBLISH_HOURS
+        if start_hour <= dt_util.now(TZ_KYIV).hour < end_hour and self._tomorrow_missing(
+            self.get_cached_data(is_new).get("date_tomorrow"), regions
+        ):
+            return fast, "awaiting_tomorrow"
+
+        streak = self._unchanged_streak.get(url, 0)
+        if streak >= ADAPTIVE_BACKOFF_AFTER:
+            factor = 2 ** min(streak - ADAPTIVE_BACKOFF_AFTER + 1, 10)
+            ceiling = max(base, timedelta(seconds=ADAPTIVE_MAX_INTERVAL))
+            return min(base * factor, ceiling), "stable"
+
+        return base, "base"
+
+    @staticmethod
+    def _tomorrow_missing(date_tomorrow: Optional[str], regions: List[Dict[str, Any]]) -> bool:
+        """True if any tracked region has no known slot for `date_tomorrow` yet."""
+        if not regions:
+            return False
+        if not date_tomorrow:
+            return True
+        for region in regions:
+            queues = (region.get("schedule") or {}).values()
+            if not any(
+                code in (STATE_ON, STATE_OFF)
+                for days in queues
+                for code in ((days or {}).get(date_tomorrow) or {}).values()
+            ):
+                return True
+        return False
+
+    def _note_response(self, url: str, changed: bool) -> None:
+        """Track consecutive unchanged responses (304 or identical body) for backoff."""
+        self._unchanged_streak[url] = 0 if changed else self._unchanged_streak.get(url, 0) + 1
+
+    def polling_state(self) -> dict[str, Any]:
+        """Effective polling per API for diagnostics."""
+        state: dict[str, Any] = {}
+        for name, url in (("old", OLD_API_URL), ("new", DTEK_API_URL)):
+            interval = self._poll_intervals.get(url)
+            last = self._last_poll.get(url)
+            state[name] = {
+                "subscribers": len(self._subscribers.get(url, {})),
+                "effective_interval_seconds": interval.total_seconds() if interval else None,
+                "reason": self._poll_reasons.get(url),
+                "unchanged_streak": self._unchanged_streak.get(url, 0),
+                "last_poll": last.isoformat() if last else None,
+            }
+        return state
+
+    @staticmethod
+    def _index_regions(data: dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Build a `cpu -> region object` index for one payload."""
+        return {r["cpu"]: r for r in data.get("regions") or [] if r.get("cpu")}
+
+    @staticmethod
+    def _catalog_signature(data: dict[str, Any]) -> tuple:
+        """Everything _build_catalog reads from one payload (ids, names, queue names)."""
+        signature = []
+        for r in data.get("regions") or []:
+            schedule = r.get("schedule")
+            queues = None if schedule is None else tuple(schedule or ())
+            signature.append((r.get("cpu"), r.get("name_ua"), r.get("name_en"), queues))
+        return tuple(signature)
+
+    def get_region(self, is_new: bool, cpu: str) -> Optional[Dict[str, Any]]:
+        """Return the raw region object of the cached payload (O(1))."""
+        regions = self._regions_new if is_new else self._regions_old
+        return regions.get(cpu)
+
+    def get_parsed_schedule(
+        self, is_new: bool, cpu: str, queue: str, base_day: date, date_tomorrow: Optional[str]
+    ) -> ParsedSchedule:
+        """Parsed today/tomorrow schedule, memoized per (api, region, queue, payload version).
+
+        Координатори з однаковими region/queue отримують один і той самий
+        (незмінний) об'єкт замість окремого парсингу.
+        """
+        version = self._version_new if is_new else self._version_old
+        key = (is_new, cpu, queue, version, base_day, date_tomorrow)
+        parsed = self._parse_cache.get(key)
+        if parsed is not None:
+            self._parse_cache.move_to_end(key)
+            self._stats["parse_cache_hits"] += 1
+            return parsed
+
+        self._stats["parse_cache_misses"] += 1
+        tomorrow_day = date.fromisoformat(date_tomorrow) if date_tomorrow else None
+        parsed = parse_schedule(
+            base_day,
+            tomorrow_day,
+            self.get_region_day(is_new, cpu, queue, base_day.isoformat()),
+            self.get_region_day(is_new, cpu, queue, date_tomorrow),
+            TZ_KYIV,
+        )
+        self._parse_cache[key] = parsed
+        while len(self._parse_cache) > PARSE_CACHE_SIZE:
+            self._parse_cache.popitem(last=False)
+        return parsed
+
+    def get_region_day(self, is_new: bool, cpu: str, queue: str, day: Optional[str]) -> Dict[str, int]:
+        """Return `{"HH:MM": code}` slots of one region/queue for a given day (or {})."""
+        region = self.get_region(is_new, cpu)
+        if not region or not day:
+            return {}
+        schedule = (region.get("schedule") or {}).get(queue) or {}
+        return schedule.get(day) or {}
+
+    async def ensure_data(self, is_new: bool, cpu: Optional[str] = None) -> dict[str, Any]:
+        """Ensure we have fresh data for the specified API.
+
+        `cpu` — регіон викликача: якщо його розклад у кеші обрізано (PRUNED_KEY),
+        це cache miss, і ми чекаємо повний запит (без валідаторів).
+        """
         now = dt_util.utcnow()
         cache_data = self._data_new if is_new else self._data_old
         cache_time = self._last_fetch_new if is_new else self._last_fetch_old
 
-        if cache_data and cache_time and (now - cache_time) < self._cache_ttl:
+        url = DTEK_API_URL if is_new else OLD_API_URL
+
+        if cpu and self.is_region_pruned(is_new, cpu):
+            return await self._async_fetch_full(is_new, url, cpu)
+
+        if cache_data and cache_time and (now - cache_time) < self._fresh_ttl(is_new, url):
+            self._stats["fresh_hits"] += 1
             return cache_data
 
-        async with self._lock:
-            # Double check inside lock
-            cache_data = self._data_new if is_new else self._data_old
-            cache_time = self._last_fetch_new if is_new else self._last_fetch_old
-            if cache_data and cache_time and (now - cache_time) < self._cache_ttl:
-                return cache_data
+        # Stale-while-revalidate: повертаємо останні валідні дані без очікування,
+        # а оновлення запускається (один раз) у фоні.
+        if cache_data and cache_time and (now - cache_time) < self._stale_ttl:
+            if url not in self._inflight:
+                self._stats["background_refreshes"] += 1
+            self._async_start_fetch(is_new, url)
+            self._stats["stale_served"] += 1
+            return cache_data
 
-            url = DTEK_API_URL if is_new else OLD_API_URL
-            
-            max_retries = 3
-            retry_delay = 2  # початкова затримка в секундах
+        self._stats["blocking_fetches"] += 1
+        task = self._async_start_fetch(is_new, url)
+        # shield: скасування одного з очікувачів не скасовує спільний запит;
+        # wait_for: оновлення координатора не висить довше за дедлайн
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), FETCH_DEADLINE)
+        except asyncio.TimeoutError:
+            _LOGGER.warning("Timed out waiting for %s, serving cached data", url)
+            return self._servable_cache(is_new)
+
+    async def _async_fetch_full(self, is_new: bool, url: str, cpu: str) -> dict[str, Any]:
+        """Wait for a full (unconditional) fetch that brings back the schedule of `cpu`."""
+        self._stats["blocking_fetches"] += 1
+        self._force_full.add(url)
+        try:
+            # Запит, що вже йде, міг бути умовним (304) — тоді після нього потрібен ще один
+            if inflight := self._inflight.get(url):
+                await asyncio.wait_for(asyncio.shield(inflight), FETCH_DEADLINE)
+            if self.is_region_pruned(is_new, cpu):
+                task = self._async_start_fetch(is_new, url)
+                await asyncio.wait_for(asyncio.shield(task), FETCH_DEADLINE)
+        except asyncio.TimeoutError:
+            _LOGGER.warning("Timed out waiting for the full payload of %s", url)
+        return self._servable_cache(is_new)
 
-            # Prepare headers for conditional request
-            headers = {}
+    def _fresh_ttl(self, is_new: bool, url: str) -> timedelta:
+        """How long cached data counts as fresh for `url`.
+
+        З підписниками — поточний адаптивний інтервал опитування, щоб виклики
+        ensure_data (точні таймери координаторів) не запускали фонові запити
+        частіше, ніж дозволяє backoff. Без підписників (config flow) — _cache_ttl.
+        """
+        if not self._subscribers.get(url):
+            return self._cache_ttl
+        interval, _reason = self._effective_interval(is_new, url)
+        return min(interval, self._stale_ttl)
+
+    def _async_start_fetch(self, is_new: bool, url: str) -> asyncio.Task:
+        """Return the in-flight fetch task for `url`, starting one if needed.
+
+        Single-flight per endpoint: усі конкуренти для одного URL чекають
+        на один і той самий запит, а різні URL не блокують один одного.
+        """
+        task = self._inflight.get(url)
+        if task is None:
+            task = self.hass.async_create_task(self._async_fetch(is_new, url))
+            self._inflight[url] = task
+            self._last_poll[url] = dt_util.utcnow()
+
+            def _done(_task: asyncio.Task) -> None:
+                self._inflight.pop(url, None)
+                self._async_schedule_poll(is_new, url)
+
+            task.add_done_callback(_done)
+        return task
+
+    async def _async_fetch(self, is_new: bool, url: str) -> dict[str, Any]:
+        """Fetch one endpoint with jittered retries under a deadline.
+
+        Must only run as the in-flight task for `url`. Поки circuit breaker
+        endpoint'а відкритий, запит не виконується і повертається кеш — лише
+        поки він не старший за _stale_ttl (hard expiry), інакше {}.
+        """
+        now = dt_util.utcnow()
+        cache_data = self._data_new if is_new else self._data_old
+        breaker = self._breakers[url]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + FETCH_DEADLINE
+
+        # Prepare headers for conditional request (тільки якщо є що повернути на 304)
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        if cache_data and url not in self._force_full:
             if url in self._etags:
                 headers["If-None-Match"] = self._etags[url]
             if url in self._last_modified:
                 headers["If-Modified-Since"] = self._last_modified[url]
 
-            for attempt in range(max_retries + 1):
-                try:
-                    _LOGGER.debug(
-                        "Fetching API (attempt %d/%d): %s", 
-                        attempt + 1, max_retries + 1, url
-                    )
-                    async with self._session.get(url, headers=headers, timeout=30) as resp:
-                        # Handle 304 Not Modified
-                        if resp.status == 304:
-                            _LOGGER.debug("HTTP 304 Not Modified for %s", url)
-                            if is_new:
-                                self._last_fetch_new = now
-                            else:
-                                self._last_fetch_old = now
-                            return cache_data or {}
-
-                        if resp.status != 200:
-                            _LOGGER.warning(
-                                "HTTP %s for %s (attempt %d/%d)", 
-                                resp.status, url, attempt + 1, max_retries + 1
-                            )
-                            if attempt < max_retries:
-                                await asyncio.sleep(retry_delay)
-                                retry_delay *= 2
-                                continue
-                            return cache_data or {}
-                        
-                        # Update tags on 200 OK
-                        if etag := resp.headers.get("ETag"):
-                            self._etags[url] = etag
-                        if last_mod := resp.headers.get("Last-Modified"):
-                            self._last_modified[url] = last_mod
-
-                        raw = await resp.json(content_type=None)
-                        
+        # Circuit breaker рахує невдалі запити (після всіх спроб), а не окремі спроби
+        last_error: Optional[str] = None
+        # Розібрана відповідь 200; застосовується (і розсилається підписникам) поза try,
+        # щоб помилка слухача не рахувалася помилкою запиту і не повторювала його
+        accepted: Optional[tuple] = None
+        for attempt in range(FETCH_MAX_ATTEMPTS):
+            if not breaker.allow_request():
+                _LOGGER.debug(
+                    "Circuit open for %s, serving cached data (retry in %.0fs)", url, breaker.retry_in
+                )
+                break
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                _LOGGER.warning("Deadline exceeded for %s, serving cached data", url)
+                break
+
+            try:
+                _LOGGER.debug(
+                    "Fetching API (attempt %d/%d): %s", attempt + 1, FETCH_MAX_ATTEMPTS, url
+                )
+                started = loop.time()
+                async with self._session.get(
+                    url, headers=headers, timeout=min(FETCH_REQUEST_TIMEOUT, remaining)
+                ) as resp:
+                    # Handle 304 Not Modified
+                    if resp.status == 304:
+                        _LOGGER.debug("HTTP 304 Not Modified for %s", url)
+                        self._record_transfer(
+                            url, header_bytes(resp.raw_headers), (loop.time() - started) * 1000
+                        )
+                        breaker.record_success()
+                        self._note_response(url, False)
                         if is_new:
-                            # New API Worker format
-                            body_str = raw.get("body")
-                            if body_str:
-                                try:
-                                    final_data = json.loads(body_str)
-                                except json.JSONDecodeError as err:
-                                    _LOGGER.error("Failed to parse New API body: %s", err)
-                                    return cache_data or {}
-                            else:
-                                final_data = raw
-                            
-                            self._data_new = final_data
                             self._last_fetch_new = now
                         else:
-                            self._data_old = raw
                             self._last_fetch_old = now
-                            
-                        return self._data_new if is_new else self._data_old
+                        # Зберігаємо і підтверджений час: після рестарту кеш має бути свіжим
+                        self._async_schedule_save()
+                        return self._servable_cache(is_new)
+
+                    if resp.status != 200:
+                        raise FetchError(f"HTTP {resp.status}")
 
-                except Exception as e:
-                    _LOGGER.error(
-                        "Error fetching %s (attempt %d/%d): %s", 
-                        url, attempt + 1, max_retries + 1, e
+                    raw = await resp.read()
+                    etag = resp.headers.get("ETag")
+                    last_mod = resp.headers.get("Last-Modified")
+                    # aiohttp розпаковує тіло сам; розмір "з мережі" — Content-Length,
+                    # а без нього відомий лише для нестисненого тіла
+                    encoding = resp.headers.get("Content-Encoding")
+                    raw_bytes = resp.content_length
+                    if raw_bytes is None and encoding in (None, "identity"):
+                        raw_bytes = len(raw)
+                    self._record_transfer(
+                        url,
+                        header_bytes(resp.raw_headers),
+                        (loop.time() - started) * 1000,
+                        raw_bytes=raw_bytes,
+                        decoded_bytes=len(raw),
+                        encoding=encoding,
                     )
-                    if attempt < max_retries:
-                        await asyncio.sleep(retry_delay)
-                        retry_delay *= 2
-                        continue
-                    return cache_data or {}
-            
-            return cache_data or {}
+
+                accepted = await self._async_decode(is_new, url, raw)
+
+                # Validators only after a successfully parsed body
+                if etag:
+                    self._etags[url] = etag
+                if last_mod:
+                    self._last_modified[url] = last_mod
+
+                breaker.record_success()
+                self._force_full.discard(url)
+                break
+
+            except Exception as e:
+                last_error = str(e) or type(e).__name__
+                self._transfer[url].record_error()
+                self._async_notify_transfer()
+                _LOGGER.warning(
+                    "Error fetching %s (attempt %d/%d): %s", url, attempt + 1, FETCH_MAX_ATTEMPTS, e
+                )
+                if breaker.state == STATE_HALF_OPEN:
+                    # Пробний запит після cooldown — без повторів
+                    break
+
+            if attempt + 1 < FETCH_MAX_ATTEMPTS:
+                delay = jittered_backoff(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+                if loop.time() + delay >= deadline:
+                    break
+                await asyncio.sleep(delay)
+
+        if accepted is not None:
+            final_data, regions, changed, signature = accepted
+            changed = self._set_payload(is_new, final_data, now, regions, changed, signature)
+            self._note_response(url, changed)
+            self._async_schedule_save()
+            return self._data_new if is_new else self._data_old
+
+        if last_error is not None:
+            breaker.record_failure(last_error)
+        return self._servable_cache(is_new)
+
+    def _servable_cache(self, is_new: bool) -> dict[str, Any]:
+        """Cached payload as a fallback for a failed fetch; {} once past the hard expiry."""
+        cache_data = self._data_new if is_new else self._data_old
+        cache_time = self._last_fetch_new if is_new else self._last_fetch_old
+        if cache_data and cache_time and (dt_util.utcnow() - cache_time) < self._stale_ttl:
+            return cache_data
+        return {}
+
+    async def _async_decode(
+        self, is_new: bool, url: str, raw: bytes
+    ) -> tuple[dict[str, Any], Dict[str, Dict[str, Any]], bool, tuple]:
+        """Decode and index a response; large ones go to the executor."""
+        args = (
+            is_new,
+            raw,
+            self._tracked_regions(url) if is_new else None,
+            self._data_new if is_new else self._data_old,
+        )
+        self._payload_sizes[url] = len(raw)
+        if len(raw) >= EXECUTOR_DECODE_THRESHOLD:
+            self._executor_jobs["decode"] = self._executor_jobs.get("decode", 0) + 1
+            return await self.hass.async_add_executor_job(self._decode_payload, *args)
+
+        start = time.perf_counter()
+        result = self._decode_payload(*args)
+        self._record_loop_blocking("decode", time.perf_counter() - start)
+        return result
+
+    @staticmethod
+    def _decode_payload(
+        is_new: bool,
+        raw: bytes,
+        wanted: Optional[set[str]],
+        current: Optional[dict[str, Any]],
+    ) -> tuple[dict[str, Any], Dict[str, Dict[str, Any]], bool, tuple]:
+        """Decode one response, index its regions and catalog signature, compare with `current`.
+
+        Не торкається стану хаба — безпечно виконувати поза event loop.
+        """
+        if is_new:
+            # New API Worker format: payload is a JSON string in "body";
+            # day maps are kept only for subscribed regions
+            data = decode_body(decode_envelope(raw), wanted)
+        else:
+            data = json_loads(raw)
+        return (
+            data,
+            SvitloApiHub._index_regions(data),
+            data != current,
+            SvitloApiHub._catalog_signature(data),
+        )
+
+    def _record_loop_blocking(self, operation: str, seconds: float) -> None:
+        stats = self._loop_blocking.setdefault(operation, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        ms = seconds * 1000
+        stats["count"] += 1
+        stats["total_ms"] += ms
+        stats["max_ms"] = max(stats["max_ms"], ms)
+
+    def loop_blocking_state(self) -> dict[str, Any]:
+        """Event loop blocking by payload processing, for diagnostics."""
+        return {
+            "executor_threshold_bytes": EXECUTOR_DECODE_THRESHOLD,
+            "payload_bytes": {
+                "old": self._payload_sizes.get(OLD_API_URL),
+                "new": self._payload_sizes.get(DTEK_API_URL),
+            },
+            "on_loop": {
+                name: {
+                    "count": int(stats["count"]),
+                    "total_ms": round(stats["total_ms"], 2),
+                    "max_ms": round(stats["max_ms"], 2),
+                }
+                for name, stats in self._loop_blocking.items()
+            },
+            "executor_jobs": dict(self._executor_jobs),
+        }
+
+    def _record_transfer(
+        self,
+        url: str,
+        headers: int,
+        ms: float,
+        raw_bytes: Optional[int] = None,
+        decoded_bytes: Optional[int] = None,
+        encoding: Optional[str] = None,
+    ) -> None:
+        # Без тіла (decoded_bytes is None) — це 304
+        stats = self._transfer[url]
+        if decoded_bytes is None:
+            stats.record_304(headers, ms)
+        else:
+            stats.record_200(raw_bytes, decoded_bytes, headers, encoding, ms)
+        self._async_notify_transfer()
+
+    @callback
+    def async_listen_transfer(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call `update_callback` after every response (diagnostic sensors)."""
+        self._transfer_listeners.append(update_callback)
+
+        @callback
+        def _unsubscribe() -> None:
+            if update_callback in self._transfer_listeners:
+                self._transfer_listeners.remove(update_callback)
+
+        return _unsubscribe
+
+    @callback
+    def _async_notify_transfer(self) -> None:
+        for update_callback in list(self._transfer_listeners):
+            update_callback()
+
+    def transfer_stats(self, is_new: bool) -> TransferStats:
+        return self._transfer[DTEK_API_URL if is_new else OLD_API_URL]
+
+    def transfer_state(self) -> dict[str, Any]:
+        """Download accounting per API for diagnostics."""
+        return {
+            "accept_encoding": ACCEPT_ENCODING,
+            "old": self._transfer[OLD_API_URL].as_dict(),
+            "new": self._transfer[DTEK_API_URL].as_dict(),
+        }
+
+    def breaker_state(self) -> dict[str, Any]:
+        """Circuit breaker state per API for diagnostics."""
+        return {
+            "old": self._breakers[OLD_API_URL].as_dict(),
+            "new": self._breakers[DTEK_API_URL].as_dict(),
+        }
@@ -10,21 +10,25 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import DOMAIN, UNRECORDED_ATTRIBUTES
 
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
-    coordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities([
-        SvitloElectricityStatusBinary(coordinator, entry),
-        SvitloEmergencyBinary(coordinator, entry)
-    ])
+    root = hass.data[DOMAIN][entry.entry_id]
+    entities: list[BinarySensorEntity] = []
+    for coordinator in root.queue_coordinators():
+        entities += [
+            SvitloElectricityStatusBinary(coordinator, entry),
+            SvitloEmergencyBinary(coordinator, entry),
+        ]
+    async_add_entities(entities)
 
 
 class SvitloBaseEntity(CoordinatorEntity):
     _attr_has_entity_name = True
+    _unrecorded_attributes = UNRECORDED_ATTRIBUTES
 
     def __init__(self, coordinator) -> None:
         super().__init__(coordinator)
@@ -12,7 +12,9 @@ from homeassistant.util import dt as dt_util
 # Імпортуємо slugify для генерації suggested_object_id (якщо знадобиться)
 from homeassistant.util import slugify
 
-from .const import DOMAIN
+from .const import CONF_ICS_TOKEN, CONF_QUEUE, DOMAIN, ICS_PAST_DAYS, QUEUE_ALL, UNRECORDED_ATTRIBUTES
+from .ics import IcsFeed, render_feed
+from .schedule import EMPTY_INDEX, STATE_OFF, ScheduleIndex, Segment
 
 # Таймзона України
 TZ_KYIV = dt_util.get_time_zone("Europe/Kyiv")
@@ -23,8 +25,24 @@ async def async_setup_entry(
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    coordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities([SvitloCalendar(coordinator, entry)])
+    root = hass.data[DOMAIN][entry.entry_id]
+    # Для ICS-фіду: /api/svitlo_live/ics/<token> (у записі "всі черги" —
+    # /api/svitlo_live/ics/<token>_<queue>)
+    token = entry.data[CONF_ICS_TOKEN]
+    calendars = hass.data[DOMAIN].setdefault("calendars", {})
+    region_wide = entry.data.get(CONF_QUEUE) == QUEUE_ALL
+    entities: list[SvitloCalendar] = []
+    for coordinator in root.queue_coordinators():
+        if region_wide:
+            feed_id = f"{token}_{coordinator.queue}"
+            title = f"{entry.title.rsplit(' / ', 1)[0]} / {coordinator.queue}"
+        else:
+            feed_id, title = token, entry.title
+        calendar = SvitloCalendar(coordinator, entry, title, f"/api/{DOMAIN}/ics/{feed_id}.ics")
+        calendars[feed_id] = calendar
+        entry.async_on_unload(lambda feed_id=feed_id: calendars.pop(feed_id, None))
+        entities.append(calendar)
+    async_add_entities(entities)
 
 
 class SvitloCalendar(CoordinatorEntity, CalendarEntity):
@@ -34,20 +52,38 @@ class SvitloCalendar(CoordinatorEntity, CalendarEntity):
     _attr_has_entity_name = True
     _attr_translation_key = "svitlo_calendar"
     _attr_icon = "mdi:calendar-clock"
+    _unrecorded_attributes = UNRECORDED_ATTRIBUTES | {"ics_path"}
 
-    def __init__(self, coordinator, entry: ConfigEntry) -> None:
+    def __init__(
+        self, coordinator, entry: ConfigEntry, title: Optional[str] = None, ics_path: Optional[str] = None
+    ) -> None:
         super().__init__(coordinator)
         self._entry = entry
+        self._title = title or entry.title
+        self._ics_path = ics_path
         self._region = getattr(coordinator, "region", "region")
         self._queue = getattr(coordinator, "queue", "queue")
         
         # Залишаємо старий unique_id для сумісності
         self._attr_unique_id = f"svitlo_calendar_{self._region}_{self._queue}"
         self._event: Optional[CalendarEvent] = None
+        # Події відключень (відсортовані, незмінні) для поточної версії графіка;
+        # i-та подія відповідає index.intervals_of(STATE_OFF)[i]
+        self._events: tuple[CalendarEvent, ...] = ()
+        self._events_version: Optional[str] = None
+        self._events_index: ScheduleIndex = EMPTY_INDEX
+        # self._event актуальна до цього моменту (початок/кінець події)
+        self._event_until: Optional[datetime] = None
+        # ICS-фід, відрендерений для версії графіка _ics_version
+        self._ics: Optional[IcsFeed] = None
+        self._ics_version: Optional[str] = None
+        self._ics_index: ScheduleIndex = EMPTY_INDEX
 
     @property
     def event(self) -> Optional[CalendarEvent]:
         """Поточна або найближча подія (визначає state: On/Off)."""
+        if self._event_until is not None and dt_util.utcnow() >= self._event_until:
+            self._update_event()
         return self._event
 
     @callback
@@ -67,137 +103,122 @@ class SvitloCalendar(CoordinatorEntity, CalendarEntity):
         Це синхронний метод, щоб викликати його з колбеку координатора.
         """
         now_utc = dt_util.utcnow()
-        # Беремо діапазон: вчора -> післязавтра (щоб точно знайти поточну)
-        start = now_utc - timedelta(days=1)
-        end = now_utc + timedelta(days=2)
-        
-        # Отримуємо події синхронно
-        events = self._get_events_sync(start, end)
-        
-        if not events:
+        index = self._ensure_events()
+
+        # Перша подія, що ще не закінчилась: поточна (active) або найближча майбутня
+        lo, _ = index.interval_bounds(STATE_OFF, now_utc, now_utc)
+        if lo >= len(self._events):
             self._event = None
+            self._event_until = None
             return
 
-        events.sort(key=lambda e: e.start)
-        
-        # Шукаємо поточну (active)
-        current = next((e for e in events if e.start <= now_utc < e.end), None)
-        # Шукаємо найближчу майбутню
-        upcoming = next((e for e in events if e.start > now_utc), None)
-        
         # Якщо є поточна — state буде ON. Якщо немає — state OFF (і покаже майбутню).
-        self._event = current or upcoming
+        # Вказівник не перераховується до найближчого переходу.
+        self._event = self._events[lo]
+        self._event_until = self._event.end if self._event.start <= now_utc else self._event.start
 
     # ---- Реалізація CalendarEntity ----
 
     async def async_get_events(
         self, hass: HomeAssistant, start_date: datetime, end_date: datetime
     ) -> List[CalendarEvent]:
-        """Метод, який викликає HA для малювання календаря (Month/Week view)."""
-        return self._get_events_sync(start_date, end_date)
+        """Метод, який викликає HA для малювання календаря (Month/Week view).
 
-    def _get_events_sync(self, start_date: datetime, end_date: datetime) -> List[CalendarEvent]:
-        """Внутрішня логіка парсингу подій (без async/await)."""
-        d = getattr(self.coordinator, "data", {}) or {}
-        
-        today_half = d.get("today_48half") or []
-        tomorrow_half = d.get("tomorrow_48half") or []
-        date_today_str = d.get("date")
-        date_tomorrow_str = d.get("tomorrow_date")
-
-        if not date_today_str or not today_half:
-            return []
-
-        try:
-            base_today = date.fromisoformat(date_today_str)
-            base_tomorrow = None
-            if date_tomorrow_str:
-                base_tomorrow = date.fromisoformat(date_tomorrow_str)
-        except (ValueError, AttributeError):
-            return []
-
-        # Перевіряємо чи дні послідовні
-        is_contiguous = False
-        if base_tomorrow:
-            is_contiguous = (base_tomorrow - base_today).days == 1
-
-        events: List[CalendarEvent] = []
-
-        if is_contiguous and tomorrow_half:
-            # Об'єднуємо в безперервний потік: 0..47 (сьогодні), 48..95 (завтра)
-            combined_half = today_half + tomorrow_half
-            combined_events = self._build_events_from_stream(base_today, combined_half)
-            events.extend(combined_events)
-        else:
-            # Обробляємо окремо
-            events.extend(self._build_events_from_stream(base_today, today_half))
-            if base_tomorrow and tomorrow_half:
-                events.extend(self._build_events_from_stream(base_tomorrow, tomorrow_half))
-
-        # Фільтрація за діапазоном
-        filtered: List[CalendarEvent] = []
-        for ev in events:
-            ev_start = ev.start if ev.start.tzinfo else dt_util.as_utc(ev.start)
-            ev_end = ev.end if ev.end.tzinfo else dt_util.as_utc(ev.end)
-
-            if ev_start < end_date and ev_end > start_date:
-                filtered.append(ev)
-
-        return filtered
-
-    def _build_events_from_stream(self, start_date_obj: date, stream: list[str]) -> List[CalendarEvent]:
-        """
-        Парсить безперервний потік напівгодинних слотів починаючи з start_date_obj 00:00.
-        Індекси 0..47 належать start_date_obj.
-        Індекси 48..95 належать start_date_obj + 1 день, тощо.
+        Сьогодні/завтра — з поточного графіка координатора, дні до сьогодні —
+        з архіву відключень на диску.
         """
-        events: List[CalendarEvent] = []
-        if not stream:
+        events = self._get_events_sync(start_date, end_date)
+
+        data = getattr(self.coordinator, "data", {}) or {}
+        if not data.get("date"):
+            return events
+        live_start = datetime.combine(date.fromisoformat(data["date"]), datetime.min.time(), tzinfo=TZ_KYIV)
+        start_utc = dt_util.as_utc(start_date)
+        archive_end = min(dt_util.as_utc(end_date), dt_util.as_utc(live_start))
+        if start_utc >= archive_end:
             return events
 
-        current_state = stream[0]
-        start_idx = 0
+        segments = await self.coordinator.hub.archive.async_intervals(
+            f"{self._region}|{self._queue}",
+            start_utc.astimezone(TZ_KYIV).date(),
+            (archive_end - timedelta(microseconds=1)).astimezone(TZ_KYIV).date(),
+        )
+        past = [
+            self._make_event(seg._replace(end=min(seg.end, archive_end)))
+            for seg in segments
+            if seg.end > start_utc and seg.start < archive_end
+        ]
+        return self._join_archive(past, events)
+
+    def _schedule_index(self) -> ScheduleIndex:
+        d = getattr(self.coordinator, "data", {}) or {}
+        return d.get("schedule_index") or EMPTY_INDEX
 
-        for i in range(1, len(stream)):
-            if stream[i] != current_state:
-                if current_state == "off":
-                    events.append(self._make_event_continuous(start_date_obj, start_idx, i))
-                current_state = stream[i]
-                start_idx = i
-        
-        # Закриваємо останній інтервал
-        if current_state == "off":
-            events.append(self._make_event_continuous(start_date_obj, start_idx, len(stream)))
+    def _ensure_events(self) -> ScheduleIndex:
+        """Rebuild the event list only when the schedule version changes."""
+        d = getattr(self.coordinator, "data", {}) or {}
+        version = d.get("schedule_version")
+        index = self._schedule_index()
+        if version != self._events_version or index is not self._events_index:
+            self._events = tuple(self._make_event(seg) for seg in index.intervals_of(STATE_OFF))
+            self._events_version = version
+            self._events_index = index
+        return index
 
-        return events
+    def _get_events_sync(self, start_date: datetime, end_date: datetime) -> List[CalendarEvent]:
+        """Внутрішня логіка вибірки подій (без async/await).
 
-    def _make_event_continuous(self, base_date: date, start_idx: int, end_idx: int) -> CalendarEvent:
-        """
-        Створює подію на основі безперервного потоку індексів.
-        0 = 00:00 базової дати
-        48 = 00:00 базової дати + 1 день
-        96 = 00:00 базової дати + 2 дні
+        Інтервали відключень беруться з індексу переходів координатора:
+        сусідні дні вже зшиті, тож відключення через північ — одна подія.
+        Події не створюються заново — лише bisect-зріз готового списку.
         """
-        def idx_to_dt(idx):
-            # Зсув у днях
-            days = idx // 48
-            remainder = idx % 48
-            hours = remainder // 2
-            minutes = 30 if remainder % 2 else 0
-            
-            # Будуємо локальний час
-            d = base_date + timedelta(days=days)
-            return datetime.combine(d, datetime.min.time()).replace(
-                hour=hours, minute=minutes, tzinfo=TZ_KYIV
-            )
+        index = self._ensure_events()
+        lo, hi = index.interval_bounds(
+            STATE_OFF, dt_util.as_utc(start_date), dt_util.as_utc(end_date)
+        )
+        return list(self._events[lo:hi])
 
-        start_local = idx_to_dt(start_idx)
-        end_local = idx_to_dt(end_idx)
+    async def async_ics_feed(self) -> IcsFeed:
+        """ICS feed (archive of the last days + live events), rendered once per schedule version."""
+        index = self._ensure_events()
+        if self._ics is not None and self._ics_version == self._events_version and self._ics_index is index:
+            return self._ics
+
+        data = getattr(self.coordinator, "data", {}) or {}
+        past: list[CalendarEvent] = []
+        if data.get("date"):
+            today = date.fromisoformat(data["date"])
+            live_start = dt_util.as_utc(datetime.combine(today, datetime.min.time(), tzinfo=TZ_KYIV))
+            segments = await self.coordinator.hub.archive.async_intervals(
+                f"{self._region}|{self._queue}", today - timedelta(days=ICS_PAST_DAYS), today - timedelta(days=1)
+            )
+            past = [
+                self._make_event(seg._replace(end=min(seg.end, live_start)))
+                for seg in segments
+                if seg.start < live_start
+            ]
+
+        self._ics = render_feed(self._title, self._attr_unique_id, self._join_archive(past, self._events))
+        self._ics_version = self._events_version
+        self._ics_index = index
+        return self._ics
+
+    def _join_archive(self, past: list[CalendarEvent], live) -> List[CalendarEvent]:
+        """Архів + поточний графік; відключення через північ у сьогодні — одна подія."""
+        if past and live and past[-1].end == live[0].start:
+            merged = self._make_event(Segment(past[-1].start, live[0].end, STATE_OFF))
+            return [*past[:-1], merged, *live[1:]]
+        return [*past, *live]
+
+    def _make_event(self, seg: Segment) -> CalendarEvent:
+        """Створює подію відключення з сегмента індексу."""
+        start_local = seg.start.astimezone(TZ_KYIV)
+        end_local = seg.end.astimezone(TZ_KYIV)
 
         return CalendarEvent(
-            summary=f"{self._entry.title}: ❌ Відключення",
-            start=dt_util.as_utc(start_local),
-            end=dt_util.as_utc(end_local),
+            summary=f"{self._title}: ❌ Відключення",
+            start=seg.start,
+            end=seg.end,
             description=f"Немає світла {start_local.strftime('%H:%M')}–{end_local.strftime('%H:%M')}",
         )
 
@@ -205,25 +226,23 @@ class SvitloCalendar(CoordinatorEntity, CalendarEntity):
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return the state attributes."""
         data = getattr(self.coordinator, "data", {}) or {}
-        # Визначаємо поточний статус за графіком (у часовій зоні Києва)
-        now = dt_util.now(TZ_KYIV)
-        index = now.hour * 2 + (1 if now.minute >= 30 else 0)
-        today_sch = data.get("today_48half", [])
-        now_status = today_sch[index] if index < len(today_sch) else "unknown"
+        # Визначаємо поточний статус за графіком (індекс переходів, UTC)
+        now_status = self._schedule_index().state_at(dt_util.utcnow())
 
         return {
             "region": getattr(self.coordinator, "region", ""),
             "queue": getattr(self.coordinator, "queue", ""),
             "now_status": now_status,
-            "today_48half": today_sch,
-            "tomorrow_48half": data.get("tomorrow_48half", []),
             "next_change_at": data.get("next_change_at"),
             "today_outage_hours": data.get("today_outage_hours"),
             "tomorrow_outage_hours": data.get("tomorrow_outage_hours"),
             "longest_outage_hours": data.get("longest_outage_hours"),
-            "history_today_48half": data.get("history_today_48half", []),
-            "history_tomorrow_48half": data.get("history_tomorrow_48half", []),
+            # Масиви графіка віддаються на запит через websocket "svitlo_live/schedule";
+            # в атрибутах лише версія, за якою картка розуміє, що треба перечитати.
+            "schedule_version": data.get("schedule_version"),
             "updated": data.get("updated"),
+            # Шлях для підписки на фід (додати до зовнішньої адреси Home Assistant)
+            "ics_path": self._ics_path,
         }
 
     @property
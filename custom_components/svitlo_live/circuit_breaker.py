@@ -0,0 +1,94 @@
+"""Per-endpoint circuit breaker and jittered backoff for the Svitlo proxies."""
+from __future__ import annotations
+
+import random
+import time
+from typing import Any, Callable, Optional
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+def jittered_backoff(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential delay (seconds) before retry `attempt` (0-based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """Closed → open after N consecutive failed fetches → half-open after a cooldown.
+
+    Невдача — це запит, для якого вичерпано всі повтори (record_failure
+    викликається один раз на запит), тож одиночний збій не відкриває ланцюг.
+
+    У стані open запити не виконуються взагалі (fail fast, віддаємо кеш).
+    Після cooldown пропускаємо одну пробну спробу (half-open): успіх закриває
+    ланцюг, невдача знову відкриває його з подвоєним cooldown (до max_cooldown).
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        cooldown: float,
+        max_cooldown: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._failure_threshold = failure_threshold
+        self._base_cooldown = cooldown
+        self._max_cooldown = max_cooldown
+        self._clock = clock
+
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a trial request through."""
+        if self.state != STATE_OPEN or self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.cooldown - self._clock())
+
+    def allow_request(self) -> bool:
+        if self.state == STATE_OPEN:
+            if self.retry_in > 0:
+                self.rejected += 1
+                return False
+            self.state = STATE_HALF_OPEN
+        return True
+
+    def record_success(self) -> None:
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.cooldown = self._base_cooldown
+        self.opened_at = None
+        self.last_error = None
+
+    def record_failure(self, error: str) -> None:
+        self.failures += 1
+        self.last_error = error
+        if self.state == STATE_HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self._max_cooldown)
+            self._open()
+        elif self.state == STATE_CLOSED and self.failures >= self._failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = STATE_OPEN
+        self.opened_at = self._clock()
+        self.trips += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "cooldown_seconds": self.cooldown,
+            "retry_in_seconds": round(self.retry_in, 1),
+            "trips": self.trips,
+            "rejected_requests": self.rejected,
+            "last_error": self.last_error,
+        }
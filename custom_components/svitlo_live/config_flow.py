@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import secrets
+
 import voluptuous as vol
 from typing import Any, Dict, List
 
@@ -15,9 +17,31 @@ from .const import (
     CONF_REGION, 
     CONF_QUEUE, 
     CONF_PRESERVE_ID,
-    DEFAULT_SCAN_INTERVAL
+    CONF_ICS_TOKEN,
+    DEFAULT_SCAN_INTERVAL,
+    CONF_HISTORY_RETENTION_DAYS,
+    DEFAULT_HISTORY_RETENTION_DAYS,
+    QUEUE_ALL,
 )
 
+# Перша опція списку черг — запис на весь регіон (усі черги одним координатором)
+QUEUE_ALL_OPTION = {"label": "All queues / Всі черги", "value": QUEUE_ALL}
+
+def _region_conflict(
+    hass: HomeAssistant, region: str, queue: str, entry_id: str | None = None
+) -> bool:
+    """Запис "всі черги" і окремі черги одного регіону не можуть існувати разом.
+
+    Їхні сутності мали б однакові unique_id і спільний пристрій.
+    """
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.entry_id == entry_id or entry.data.get(CONF_REGION) != region:
+            continue
+        other = entry.data.get(CONF_QUEUE)
+        if other != queue and QUEUE_ALL in (other, queue):
+            return True
+    return False
+
 async def _async_get_hub(hass: HomeAssistant) -> SvitloApiHub:
     """Get the API hub from hass data or create it."""
     if "hub" not in hass.data.get(DOMAIN, {}):
@@ -31,6 +55,7 @@ class SvitloConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self._region_id: str | None = None
         self._region_name: str | None = None
         self._catalog: List[Dict[str, Any]] = []
+        self._catalog_index: Dict[str, Dict[str, Any]] = {}
 
     @staticmethod
     @callback
@@ -40,16 +65,16 @@ class SvitloConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_user(self, user_input: dict[str, Any] | None = None):
         hub = await _async_get_hub(self.hass)
         self._catalog = await hub.get_regions_catalog()
+        self._catalog_index = await hub.get_regions_index()
         
         if user_input is not None:
-            region_name = user_input[CONF_REGION]
-            region_node = next((r for r in self._catalog if r["name"] == region_name), None)
+            region_node = self._catalog_index.get(user_input[CONF_REGION])
             if region_node:
                 self._region_id = region_node["id"]
                 self._region_name = region_node["name"]
                 return await self.async_step_details()
 
-        region_options = [{"label": r["name"], "value": r["name"]} for r in self._catalog]
+        region_options = [{"label": r["name"], "value": r["id"]} for r in self._catalog]
         
         data_schema = vol.Schema({
             vol.Required(CONF_REGION): selector({
@@ -66,12 +91,14 @@ class SvitloConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         if not self._region_id:
             return await self.async_step_user()
 
-        region_node = next((r for r in self._catalog if r["id"] == self._region_id), None)
+        region_node = self._catalog_index.get(self._region_id)
         if not region_node:
             return await self.async_step_user()
             
         queues = region_node.get("queues", [])
         queue_options = [{"label": q, "value": q} for q in queues]
+        if len(queues) > 1:
+            queue_options.insert(0, QUEUE_ALL_OPTION)
 
         if user_input is not None:
             queue = user_input[CONF_QUEUE]
@@ -80,17 +107,26 @@ class SvitloConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             await self.async_set_unique_id(f"{self._region_id}_{queue}")
             
             if self.context.get("source") == config_entries.SOURCE_RECONFIGURE:
+                entry = self._get_reconfigure_entry()
+                if _region_conflict(self.hass, self._region_id, queue, entry.entry_id):
+                    return self.async_abort(reason="region_conflict")
                 return self.async_update_reload_and_abort(
-                    self._get_reconfigure_entry(),
-                    data={CONF_REGION: self._region_id, CONF_QUEUE: queue},
+                    entry,
+                    data={**entry.data, CONF_REGION: self._region_id, CONF_QUEUE: queue},
                     title=title
                 )
 
             self._abort_if_unique_id_configured()
+            if _region_conflict(self.hass, self._region_id, queue):
+                return self.async_abort(reason="region_conflict")
             
             return self.async_create_entry(
                 title=title,
-                data={CONF_REGION: self._region_id, CONF_QUEUE: queue},
+                data={
+                    CONF_REGION: self._region_id,
+                    CONF_QUEUE: queue,
+                    CONF_ICS_TOKEN: secrets.token_urlsafe(32),
+                },
             )
 
         data_schema = vol.Schema({
@@ -111,17 +147,25 @@ class SvitloOptionsFlow(config_entries.OptionsFlow):
 
     def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
         self._config_entry = config_entry
-        self._catalog: List[Dict[str, Any]] = []
+        self._catalog_index: Dict[str, Dict[str, Any]] = {}
 
     async def async_step_init(self, user_input: dict[str, Any] | None = None):
         """Manage the options."""
         hub = await _async_get_hub(self.hass)
-        self._catalog = await hub.get_regions_catalog()
+        self._catalog_index = await hub.get_regions_index()
         
         region_id = self._config_entry.data.get(CONF_REGION)
-        region_node = next((r for r in self._catalog if r["id"] == region_id), None)
+        region_node = self._catalog_index.get(region_id)
         
-        if user_input is not None:
+        errors: dict[str, str] = {}
+        if user_input is not None and _region_conflict(
+            self.hass,
+            region_id,
+            user_input.get(CONF_QUEUE, self._config_entry.data.get(CONF_QUEUE)),
+            self._config_entry.entry_id,
+        ):
+            errors["base"] = "region_conflict"
+        elif user_input is not None:
             # We update data for queue, and options for interval
             new_data = dict(self._config_entry.data)
             if CONF_QUEUE in user_input:
@@ -133,8 +177,12 @@ class SvitloOptionsFlow(config_entries.OptionsFlow):
                 old_queue = self._config_entry.data.get(CONF_QUEUE)
                 new_queue = new_data.get(CONF_QUEUE)
                 
-                # Only if queue changed and region is present (it should be)
-                if old_queue and new_queue and old_queue != new_queue:
+                # Only if queue changed and region is present (it should be);
+                # unique_id "всіх черг" не переносяться на одну чергу і навпаки
+                if (
+                    old_queue and new_queue and old_queue != new_queue
+                    and QUEUE_ALL not in (old_queue, new_queue)
+                ):
                     registry = er.async_get(self.hass)
                     entry_id = self._config_entry.entry_id
                     
@@ -176,15 +224,23 @@ class SvitloOptionsFlow(config_entries.OptionsFlow):
                 data=new_data,
                 title=new_title,
                 options={
-                    "scan_interval_seconds": user_input.get("scan_interval_seconds", DEFAULT_SCAN_INTERVAL)
+                    "scan_interval_seconds": user_input.get("scan_interval_seconds", DEFAULT_SCAN_INTERVAL),
+                    CONF_HISTORY_RETENTION_DAYS: user_input.get(
+                        CONF_HISTORY_RETENTION_DAYS, DEFAULT_HISTORY_RETENTION_DAYS
+                    ),
                 }
             )
             return self.async_create_entry(title="", data={})
 
         queues = region_node.get("queues", []) if region_node else []
         queue_options = [{"label": q, "value": q} for q in queues]
+        if len(queues) > 1:
+            queue_options.insert(0, QUEUE_ALL_OPTION)
         current_queue = self._config_entry.data.get(CONF_QUEUE)
         current_interval = self._config_entry.options.get("scan_interval_seconds", DEFAULT_SCAN_INTERVAL)
+        current_retention = self._config_entry.options.get(
+            CONF_HISTORY_RETENTION_DAYS, DEFAULT_HISTORY_RETENTION_DAYS
+        )
 
         schema = {}
         
@@ -197,8 +253,13 @@ class SvitloOptionsFlow(config_entries.OptionsFlow):
                 "boolean": {}
             })
 
+        schema[vol.Optional(CONF_HISTORY_RETENTION_DAYS, default=current_retention)] = selector({
+            "number": {"min": 1, "max": 365, "step": 1, "mode": "box", "unit_of_measurement": "d"}
+        })
+
         return self.async_show_form(
             step_id="init", 
             data_schema=vol.Schema(schema),
+            errors=errors,
             description_placeholders={"region": region_node["name"] if region_node else region_id}
         )
@@ -10,10 +10,70 @@ PLATFORMS: list[Platform] = [
 
 DEFAULT_SCAN_INTERVAL = 600
 
+# Persistent hub cache (.storage/svitlo_live.hub_cache)
+STORAGE_KEY = f"{DOMAIN}.hub_cache"
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 30
+
+# Persistent schedule revisions history (.storage/svitlo_live.schedule_history)
+HISTORY_STORAGE_KEY = f"{DOMAIN}.schedule_history"
+HISTORY_STORAGE_VERSION = 1
+HISTORY_MAX_REVISIONS_PER_DAY = 48
+CONF_HISTORY_RETENTION_DAYS = "history_retention_days"
+DEFAULT_HISTORY_RETENTION_DAYS = 30
+
+# Archive of past outage intervals, one .storage file per month
+# (.storage/svitlo_live.outage_archive + svitlo_live.outage_archive.YYYY-MM)
+ARCHIVE_STORAGE_KEY = f"{DOMAIN}.outage_archive"
+ARCHIVE_STORAGE_VERSION = 1
+ARCHIVE_RETENTION_MONTHS = 12
+ARCHIVE_CACHE_MONTHS = 3
+
+# ICS feed: archived days before today included in the feed
+ICS_PAST_DAYS = 30
+
+# Max parsed (api, region, queue, payload version) schedules kept by the hub
+PARSE_CACHE_SIZE = 64
+
+# Adaptive hub polling (база — найменший scan_interval серед підписників)
+ADAPTIVE_FAST_INTERVAL = 120  # графіка на завтра ще немає / аварійні відключення
+ADAPTIVE_MAX_INTERVAL = 3600  # стеля backoff при стабільному payload
+ADAPTIVE_BACKOFF_AFTER = 3  # незмінних відповідей (304 або той самий body) до backoff
+ADAPTIVE_PUBLISH_HOURS = (16, 24)  # год. (Київ), коли зазвичай публікують графік на завтра
+
+# Fetch resilience: retries with full-jitter backoff under an overall deadline,
+# and a per-endpoint circuit breaker (fail fast and serve cached data)
+FETCH_MAX_ATTEMPTS = 3
+FETCH_REQUEST_TIMEOUT = 20
+FETCH_DEADLINE = 45
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 8.0
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_COOLDOWN = 120
+BREAKER_MAX_COOLDOWN = 1800
+
+# Responses from this size (bytes) are decoded and indexed in the executor
+EXECUTOR_DECODE_THRESHOLD = 256 * 1024
+
+# Атрибути з високою "текучістю", які не пишемо в recorder
+UNRECORDED_ATTRIBUTES = frozenset({
+    "today_48half",
+    "tomorrow_48half",
+    "history_today_48half",
+    "history_tomorrow_48half",
+    "schedule_version",
+    "updated",
+})
+
 CONF_REGION = "region"
 CONF_QUEUE = "queue"
 CONF_OPERATOR = "operator"
 CONF_PRESERVE_ID = "preserve_id"
+# Випадковий токен запису для неавторизованого URL ICS-фіду
+CONF_ICS_TOKEN = "ics_token"
+
+# Значення CONF_QUEUE для запису "всі черги регіону" (один координатор на регіон)
+QUEUE_ALL = "all"
 
 # Static mappings are deprecated in favor of dynamic fetching, but kept for migration if needed.
 API_REGION_MAP = {
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import logging
 import json
 from datetime import datetime, timedelta, date, time
@@ -22,6 +23,17 @@ from .const import (
     API_REGION_MAP,
     NEW_API_REGIONS,  # <--- Імпортуємо множину нових регіонів
 )
+from .schedule import (
+    DaySchedule,
+    EMPTY_DAY,
+    EMPTY_INDEX,
+    STATE_ON,
+    STATE_OFF,
+    ParsedSchedule,
+    ScheduleIndex,
+    slot_start_utc,
+)
+from .region_stats import RegionStats, compute_region_stats
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,6 +42,10 @@ MIN_REUSE_SECONDS = 600
 MIDNIGHT_BLOCK_MINUTES = 20
 
 
+class RegionNotFound(ValueError):
+    """Region key is missing from the API payload."""
+
+
 class SvitloCoordinator(DataUpdateCoordinator[dict[str, Any]]):
     """Тягне JSON з API і будує дані для конкретного region/queue."""
 
@@ -43,33 +59,79 @@ class SvitloCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         # For legacy entries, we'll try to find it in the current catalog.
         self.is_new_api = False
         self.api_region_key = self.region
-        self._history_today: list[list[str]] = []
-        self._history_tomorrow: list[list[str]] = []
+        # catalog_version хаба, для якої resolve-нуто маршрут (None = ще не resolve-нуто)
+        self._route_version: Optional[tuple[int, int]] = None
+        self._history_today: list[DaySchedule] = []
+        self._history_tomorrow: list[DaySchedule] = []
+        # Fingerprint останнього розпарсеного зрізу та результат парсингу
+        self._fingerprint: Optional[str] = None
+        self._parsed: Optional[dict[str, Any]] = None
 
         scan_seconds = int(config.get("scan_interval_seconds", DEFAULT_SCAN_INTERVAL))
 
 
         self._unsub_precise: Optional[Callable[[], None]] = None
 
+        # Опитування API веде хаб (один таймер на endpoint); координатор лише
+        # підписується на нові версії payload з бажаним інтервалом.
+        self._scan_interval = timedelta(seconds=scan_seconds)
+        self._unsub_hub: Optional[Callable[[], None]] = None
+        self._subscribed_route: Optional[tuple[bool, str]] = None
+
         super().__init__(
             hass=hass,
             logger=_LOGGER,
             name=f"svitlo_live_{self.region}_{self.queue}",
-            update_interval=timedelta(seconds=scan_seconds),
+            update_interval=None,
+            # Слухачі (і записи стану) лише коли дані дійсно змінились
+            always_update=False,
         )
 
     async def _async_update_data(self) -> dict[str, Any]:
         """Fetch and parse data from the appropriate API."""
-        # 1) Get regions to find out which API to use and what the actual key is
-        catalog = await self.hub.get_regions_catalog()
-        
+        # 1) Routing (is_new_api / api_region_key) is resolved once and reused;
+        #    re-resolve only when the hub catalog changed.
+        if self._route_version is None:
+            await self._async_resolve_route()
+        elif self._route_version != self.hub.catalog_version:
+            self._resolve_route(self.hub.get_cached_regions_index())
+
+        # 2) Fetch fresh JSON only from the API this region lives in
+        last_json = await self.hub.ensure_data(is_new=self.is_new_api, cpu=self.api_region_key)
+        if not last_json:
+            raise UpdateFailed(f"No data available for {'New' if self.is_new_api else 'Old'} API")
+        if self.hub.is_region_pruned(self.is_new_api, self.api_region_key):
+            # Повний payload не прийшов — не публікуємо "nosched", спробуємо пізніше
+            raise UpdateFailed(f"Schedule of {self.api_region_key} is not loaded yet")
+
+        # 3) Parse (on a lookup miss re-resolve the route once and retry)
+        try:
+            try:
+                payload = self._build_from_api(last_json)
+            except RegionNotFound:
+                await self._async_resolve_route()
+                last_json = await self.hub.ensure_data(is_new=self.is_new_api, cpu=self.api_region_key)
+                payload = self._build_from_api(last_json or {})
+        except Exception as e:
+            raise UpdateFailed(f"Parse/Build error for {self.region}: {e}") from e
+
+        # 4) Precise tick
+        self._schedule_precise_refresh(payload)
+        return payload
+
+    async def _async_resolve_route(self) -> None:
+        """Resolve routing against the full catalog (fetches both APIs if needed)."""
+        self._resolve_route(await self.hub.get_regions_index())
+
+    def _resolve_route(self, catalog: dict[str, dict[str, Any]]) -> None:
+        """Find out which API serves this region and under which key."""
         # Try finding by exact match or mapped match
         target_id = self.region
         mapped_id = API_REGION_MAP.get(self.region)
         
-        region_info = next((r for r in catalog if r["id"] == target_id), None)
+        region_info = catalog.get(target_id)
         if not region_info and mapped_id:
-            region_info = next((r for r in catalog if r["id"] == mapped_id), None)
+            region_info = catalog.get(mapped_id)
             if region_info:
                 target_id = mapped_id
         
@@ -79,75 +141,144 @@ class SvitloCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         else:
             # Fallback for completely unknown regions
             _LOGGER.warning(
-                "Region %s not found in dynamic catalog. Available regions: %s", 
+                "Region %s not found in dynamic catalog (%d regions available)", 
                 self.region,
-                [r["id"] for r in catalog]
+                len(catalog)
             )
             self.is_new_api = (self.region in NEW_API_REGIONS or mapped_id in NEW_API_REGIONS)
             self.api_region_key = mapped_id if mapped_id and self.is_new_api else self.region
 
-        # 2) Fetch fresh JSON from appropriate API
-        last_json = await self.hub.ensure_data(is_new=self.is_new_api)
-        if not last_json:
-            raise UpdateFailed(f"No data available for {'New' if self.is_new_api else 'Old'} API")
+        self._route_version = self.hub.catalog_version
+        self._async_sync_subscription()
 
-        # 2) Parse
+    @callback
+    def _async_sync_subscription(self) -> None:
+        """Keep the hub subscription on the API/region this entry currently resolves to."""
+        route = (self.is_new_api, self.api_region_key)
+        if self._subscribed_route == route and self._unsub_hub:
+            return
+        if self._unsub_hub:
+            self._unsub_hub()
+        self._unsub_hub = self.hub.async_subscribe(
+            self.is_new_api, self._handle_hub_update, self._scan_interval, self.api_region_key
+        )
+        self._subscribed_route = route
+
+    @callback
+    def _handle_hub_update(self) -> None:
+        """New payload version from the hub: rebuild from cache and push to entities."""
+        if self._route_version != self.hub.catalog_version:
+            self._resolve_route(self.hub.get_cached_regions_index())
+        if self.hub.is_region_pruned(self.is_new_api, self.api_region_key):
+            # Розклад регіону обрізано в кеші — повний запит через звичайний refresh
+            self.hass.async_create_task(self.async_request_refresh())
+            return
         try:
-            payload = self._build_from_api(last_json)
+            payload = self._build_from_api(self.hub.get_cached_data(self.is_new_api))
+        except RegionNotFound:
+            # Повний resolve маршруту (з мережею) — через звичайний refresh
+            self.hass.async_create_task(self.async_request_refresh())
+            return
         except Exception as e:
-            raise UpdateFailed(f"Parse/Build error for {self.region}: {e}") from e
+            _LOGGER.warning("Failed to apply hub update for %s/%s: %s", self.region, self.queue, e)
+            return
 
-        # 3) Precise tick
         self._schedule_precise_refresh(payload)
-        return payload
+        self.async_set_updated_data(payload)
+
+    def queue_coordinators(self) -> list[SvitloCoordinator]:
+        """Coordinators that back entity sets (one per queue)."""
+        return [self]
+
+    def coordinator_for_unique_id(self, unique_id: str) -> Optional[SvitloCoordinator]:
+        """Coordinator serving the entity with `unique_id`."""
+        return self
+
+    @callback
+    def async_unsubscribe(self) -> None:
+        """Drop the hub subscription and the precise timer (on entry unload)."""
+        if self._unsub_hub:
+            self._unsub_hub()
+            self._unsub_hub = None
+            self._subscribed_route = None
+        if self._unsub_precise:
+            self._unsub_precise()
+            self._unsub_precise = None
 
     def _build_from_api(self, api: dict[str, Any]) -> dict[str, Any]:
         date_today = api.get("date_today")
         date_tomorrow = api.get("date_tomorrow")
 
-        # Шукаємо регіон.
-        # self.api_region_key вже налаштовано в __init__:
+        # Шукаємо регіон через індекс хаба (cpu -> region, будується раз на payload).
+        # self.api_region_key вже налаштовано в _resolve_route:
         # - для нових областей це правильний ключ (kharkivska...)
         # - для старих областей це старий ключ (mikolaivska...)
-        regions_list = api.get("regions", [])
-        region_obj = next((r for r in regions_list if r.get("cpu") == self.api_region_key), None)
+        region_obj = self.hub.get_region(self.is_new_api, self.api_region_key)
         
         if not region_obj:
-            raise ValueError(f"Region '{self.api_region_key}' not found in API response")
+            raise RegionNotFound(f"Region '{self.api_region_key}' not found in API response")
+
+        is_emergency = region_obj.get("emergency", False)
+        base_day = datetime.fromisoformat(date_today).date() if date_today else dt_util.now(TZ_KYIV).date()
+        slots_today_map = self.hub.get_region_day(self.is_new_api, self.api_region_key, self.queue, base_day.isoformat())
+        slots_tomorrow_map = self.hub.get_region_day(self.is_new_api, self.api_region_key, self.queue, date_tomorrow)
+
+        # Fingerprint зрізу region/queue: якщо нічого не змінилось — не парсимо
+        # повторно, а перераховуємо лише поля, що залежать від часу.
+        fingerprint = self._fingerprint_slice(
+            base_day.isoformat(), date_tomorrow, is_emergency, slots_today_map, slots_tomorrow_map
+        )
+        if self._parsed is None or fingerprint != self._fingerprint:
+            # Розпарсений графік спільний для всіх координаторів з тим самим
+            # (api, region, queue, версія payload) — кеш у хабі.
+            parsed = self.hub.get_parsed_schedule(
+                self.is_new_api, self.api_region_key, self.queue, base_day, date_tomorrow
+            )
+            self._parsed = self._parse_slice(base_day, date_tomorrow, is_emergency, parsed)
+            # Компактна версія графіка замість масивів в атрибутах (див. websocket_api.py)
+            self._parsed["schedule_version"] = fingerprint[:12]
+            self._fingerprint = fingerprint
+        else:
+            _LOGGER.debug("Schedule for %s/%s unchanged, reusing parsed data", self.region, self.queue)
+
+        return self._with_time_fields(self._parsed)
+
+    def _fingerprint_slice(self, *parts: Any) -> str:
+        """Stable hash of the raw region/queue slice (canonical JSON)."""
+        raw = json.dumps([self.is_new_api, *parts], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _parse_slice(
+        self,
+        base_day: date,
+        date_tomorrow: Optional[str],
+        is_emergency: bool,
+        parsed: ParsedSchedule,
+    ) -> dict[str, Any]:
+        """Build the time-independent part of the payload around a (shared) parsed schedule."""
+        date_today = base_day.isoformat()
 
-        # --- Стандартна логіка парсингу (без змін) ---
-        
         # Check for Day Rollover (Midnight)
         # If API date_today is different from the date in our last successful data,
         # it means the day has switched.
-        if self.data and self.data.get("date") and date_today:
-            previous_date = self.data["date"]
-            if previous_date != date_today:
-                _LOGGER.debug("Day rollover detected: %s -> %s. Clearing history.", previous_date, date_today)
-                # User Request (Fix):
-                # Clear history completely on day switch.
-                self._history_today = []
-                self._history_tomorrow = []
-                # We also need to ensure we don't push "yesterday's" schedule into today's history in the block below.
-                # So we return early or handle it by not matching dates. 
-                # Ideally we can use a flag, but since we are inside a method, let's just note it.
-                # Actually, we can rely on verifying 'previous_date == date_today' before updating history.
-
-        is_emergency = region_obj.get("emergency", False)
-        schedule = (region_obj.get("schedule") or {}).get(self.queue) or {}
-        slots_today_map = schedule.get(date_today) or {}
-        slots_tomorrow_map = schedule.get(date_tomorrow) or {}
-
-        has_any_slots = any(v in (1, 2) for v in slots_today_map.values())
-        if not has_any_slots:
-             base_day = datetime.fromisoformat(date_today).date() if date_today else dt_util.now(TZ_KYIV).date()
+        if self.data and self.data.get("date") and self.data["date"] != date_today:
+            _LOGGER.debug("Day rollover detected: %s -> %s. Clearing history.", self.data["date"], date_today)
+            # User Request (Fix):
+            # Clear history completely on day switch.
+            # History is only updated below when 'previous_date == date_today',
+            # so yesterday's schedule never ends up in today's history.
+            self._history_today = []
+            self._history_tomorrow = []
+
+        if not parsed.has_schedule:
              return {
                 "queue": self.queue,
-                "date": base_day.isoformat(),
+                "date": date_today,
                 "now_status": "nosched",
                 "now_halfhour_index": None,
                 "next_change_at": None,
-                "today_48half": [],
+                "today_48half": EMPTY_DAY,
+                "schedule_index": EMPTY_INDEX,
                 "updated": dt_util.utcnow().replace(microsecond=0).isoformat(),
                 "source": DTEK_API_URL if self.is_new_api else OLD_API_URL,
                 "next_on_at": None,
@@ -159,58 +290,81 @@ class SvitloCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                 "history_today_48half": [],
                 "history_tomorrow_48half": [],
                 "tomorrow_date": None,
-                "tomorrow_48half": [],
+                "tomorrow_48half": EMPTY_DAY,
              }
 
-        def build_half_list(slots_map: dict[str, int]) -> list[str]:
-            res: list[str] = []
-            for h in range(24):
-                for m in (0, 30):
-                    label = f"{h:02d}:{m:02d}"
-                    code = int(slots_map.get(label, 0))
-                    if code == 1: res.append("on")
-                    elif code == 2: res.append("off")
-                    else: res.append("unknown")
-            return res
-
-        today_half = build_half_list(slots_today_map)
-        tomorrow_half = build_half_list(slots_tomorrow_map) if slots_tomorrow_map else []
-        # If all slots are "unknown", there's no real schedule → treat as empty
-        if tomorrow_half and all(s == "unknown" for s in tomorrow_half):
-            tomorrow_half = []
-
-        # --- Statistics calculation ---
-        today_outage_hours = today_half.count("off") * 0.5
-        tomorrow_outage_hours = tomorrow_half.count("off") * 0.5 if tomorrow_half else None
-
-        def get_longest_consecutive_off(series: list[str]) -> float:
-            max_count = 0
-            current_count = 0
-            for state in series:
-                if state == "off":
-                    current_count += 1
-                else:
-                    max_count = max(max_count, current_count)
-                    current_count = 0
-            max_count = max(max_count, current_count)
-            return max_count * 0.5
-
-        # Longest outage can span across today and tomorrow if available
-        combined_half = today_half + (tomorrow_half or [])
-        longest_outage = get_longest_consecutive_off(combined_half)
+        today_half = parsed.today
+        tomorrow_half = parsed.tomorrow
+
+        data = {
+            "queue": self.queue,
+            "date": date_today,
+            "today_48half": today_half,
+            "schedule_index": parsed.index,
+            "updated": dt_util.utcnow().replace(microsecond=0).isoformat(),
+            "source": DTEK_API_URL if self.is_new_api else OLD_API_URL,
+            "today_outage_hours": parsed.today_outage_hours,
+            "tomorrow_outage_hours": parsed.tomorrow_outage_hours,
+            "longest_outage_hours": parsed.longest_outage_hours,
+            "history_today_48half": self._history_today,
+            "history_tomorrow_48half": self._history_tomorrow,
+            "is_emergency": is_emergency,
+        }
+
+        # Update "history" (store up to 3 previous versions)
+        # Only update history if the date hasn't changed (avoid pushing yesterday's data into today's history)
+        if self.data and self.data.get("date") == date_today:
+            old_today = self.data.get("today_48half") or EMPTY_DAY
+            if today_half and old_today and today_half != old_today:
+                if not self._history_today or old_today != self._history_today[0]:
+                    self._history_today = [old_today, *self._history_today][:3]
+                data["history_today_48half"] = self._history_today
+            
+            old_tomorrow = self.data.get("tomorrow_48half") or EMPTY_DAY
+            if tomorrow_half and old_tomorrow and tomorrow_half != old_tomorrow:
+                if not self._history_tomorrow or old_tomorrow != self._history_tomorrow[0]:
+                    self._history_tomorrow = [old_tomorrow, *self._history_tomorrow][:3]
+                data["history_tomorrow_48half"] = self._history_tomorrow
+
+        if date_tomorrow and tomorrow_half:
+            data["tomorrow_date"] = date_tomorrow
+            data["tomorrow_48half"] = tomorrow_half
+
+        # Персистентна історія ревізій (пише лише якщо графік дня змінився)
+        history_key = f"{self.region}|{self.queue}"
+        self.hub.history.async_record(history_key, date_today, today_half)
+        if date_tomorrow and tomorrow_half:
+            self.hub.history.async_record(history_key, date_tomorrow, tomorrow_half)
+
+        # Архів відключень для календаря (остання версія графіка кожного дня)
+        self.hub.archive.async_record(history_key, date_today, today_half)
+        if date_tomorrow and tomorrow_half:
+            self.hub.archive.async_record(history_key, date_tomorrow, tomorrow_half)
+
+        return data
+
+    def _with_time_fields(self, parsed: dict[str, Any]) -> dict[str, Any]:
+        """Copy of the parsed payload with the time-dependent fields recomputed."""
+        data = dict(parsed)
+        if data.get("now_status") == "nosched":
+            return data
+
+        today_half: DaySchedule = data["today_48half"]
+        index: ScheduleIndex = data["schedule_index"]
+        base_day = date.fromisoformat(data["date"])
 
         now_local = dt_util.now(TZ_KYIV)
-        base_day = datetime.fromisoformat(date_today).date() if date_today else now_local.date()
-        
         if now_local.date() != base_day:
             idx = 0
         else:
             idx = now_local.hour * 2 + (1 if now_local.minute >= 30 else 0)
 
-        cur = today_half[idx] if today_half else "unknown"
+        cur = today_half.state_at(idx)
 
-        next_on_at = self._find_next_at(["on"], base_day, today_half, idx, date_tomorrow, tomorrow_half)
-        next_off_at = self._find_next_at(["off"], base_day, today_half, idx, date_tomorrow, tomorrow_half)
+        # Пошук починається з наступного слоту після поточного
+        search_from = slot_start_utc(datetime.combine(base_day, time.min, tzinfo=TZ_KYIV), idx + 1)
+        next_on_at = self._iso_or_none(index.next_at(STATE_ON, search_from))
+        next_off_at = self._iso_or_none(index.next_at(STATE_OFF, search_from))
 
         # Determine next change time based on current status and calculated timestamps
         if cur == "off":
@@ -234,46 +388,13 @@ class SvitloCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             except Exception as e:
                 _LOGGER.debug("Error formatting next_change_at: %s", e)
 
-        data = {
-            "queue": self.queue,
-            "date": base_day.isoformat(),
-            "now_status": cur,
-            "now_halfhour_index": idx,
-            "next_change_at": next_change_hhmm,
-            "today_48half": today_half,
-            "updated": dt_util.utcnow().replace(microsecond=0).isoformat(),
-            "source": DTEK_API_URL if self.is_new_api else OLD_API_URL,
-            "next_on_at": next_on_at,
-            "next_off_at": next_off_at,
-            "today_outage_hours": today_outage_hours,
-            "tomorrow_outage_hours": tomorrow_outage_hours,
-            "longest_outage_hours": longest_outage,
-            "history_today_48half": self._history_today,
-            "history_tomorrow_48half": self._history_tomorrow,
-            "is_emergency": is_emergency,
-        }
-
-        # Update "history" (store up to 3 previous versions)
-        # Only update history if the date hasn't changed (avoid pushing yesterday's data into today's history)
-        if self.data and self.data.get("date") == date_today:
-            old_today = self.data.get("today_48half", [])
-            if today_half and old_today and today_half != old_today:
-                if not self._history_today or old_today != self._history_today[0]:
-                    self._history_today.insert(0, old_today)
-                    self._history_today = self._history_today[:3]
-                data["history_today_48half"] = self._history_today
-            
-            old_tomorrow = self.data.get("tomorrow_48half", [])
-            if tomorrow_half and old_tomorrow and tomorrow_half != old_tomorrow:
-                if not self._history_tomorrow or old_tomorrow != self._history_tomorrow[0]:
-                    self._history_tomorrow.insert(0, old_tomorrow)
-                    self._history_tomorrow = self._history_tomorrow[:3]
-                data["history_tomorrow_48half"] = self._history_tomorrow
-
-        if date_tomorrow and tomorrow_half:
-            data["tomorrow_date"] = date_tomorrow
-            data["tomorrow_48half"] = tomorrow_half
-
+        data.update(
+            now_status=cur,
+            now_halfhour_index=idx,
+            next_change_at=next_change_hhmm,
+            next_on_at=next_on_at,
+            next_off_at=next_off_at,
+        )
         return data
 
     # ... методи _localize_kyiv, _schedule_precise_refresh та статичні методи без змін ...
@@ -285,31 +406,25 @@ class SvitloCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             return localize(d)
         return d.replace(tzinfo=TZ_KYIV)
 
-    def _schedule_precise_refresh(self, data: dict[str, Any]) -> None:
+    def _next_transition(self, data: dict[str, Any]) -> Optional[datetime]:
+        """Next state change of the payload (UTC), None if there is nothing to wait for."""
         if data.get("now_status") == "nosched":
-            if self._unsub_precise:
-                self._unsub_precise()
-                self._unsub_precise = None
-            return
+            return None
+        index: Optional[ScheduleIndex] = data.get("schedule_index")
+        if not index:
+            return None
+        # Наступний перехід стану береться з індексу (bisect), без парсингу HH:MM
+        return index.next_change(dt_util.utcnow())
 
+    def _schedule_precise_refresh(self, data: dict[str, Any]) -> None:
         if self._unsub_precise:
             self._unsub_precise()
             self._unsub_precise = None
 
-        next_change_hhmm = data.get("next_change_at")
-        base_date_iso = data.get("date")
-        if not next_change_hhmm or not base_date_iso:
-            return
-
         try:
-            hh, mm = [int(x) for x in next_change_hhmm.split(":")]
-            base_day = datetime.fromisoformat(base_date_iso).date()
-            local_naive = datetime.combine(base_day, time(hour=hh, minute=mm, second=0, microsecond=0))
-            candidate_kyiv = self._localize_kyiv(local_naive)
-            now_kyiv = dt_util.now(TZ_KYIV)
-            if candidate_kyiv <= now_kyiv:
-                candidate_kyiv = candidate_kyiv + timedelta(days=1)
-            candidate_utc = dt_util.as_utc(candidate_kyiv)
+            candidate_utc = self._next_transition(data)
+            if candidate_utc is None:
+                return
 
             @callback
             def _tick(_now) -> None:
@@ -320,25 +435,108 @@ class SvitloCoordinator(DataUpdateCoordinator[dict[str, Any]]):
             _LOGGER.debug("Failed to schedule precise refresh: %s", e)
 
     @staticmethod
-    def _find_next_at(target_states: list[str], base_date: date, today_half: list[str], idx: int, tomorrow_date_iso: Optional[str], tomorrow_half: Optional[list[str]]) -> Optional[str]:
-        if not today_half: return None
-        today_tail = today_half[idx + 1 :]
-        seq = list(today_tail)
-        has_tomorrow = bool(tomorrow_date_iso and tomorrow_half)
-        if has_tomorrow: seq.extend(tomorrow_half or [])
-        
-        pos = next((i for i, s in enumerate(seq) if s in target_states), None)
-        if pos is None: return None
+    def _iso_or_none(value: Optional[datetime]) -> Optional[str]:
+        return value.isoformat() if value else None
 
-        if pos < len(today_tail):
-            base_local_midnight = datetime.combine(base_date, datetime.min.time(), tzinfo=TZ_KYIV)
-            minutes_from_base = (idx + 1 + pos) * 30
-            next_local = base_local_midnight + timedelta(minutes=minutes_from_base)
-        else:
-            if not has_tomorrow: return None
-            tomorrow_date = datetime.fromisoformat(tomorrow_date_iso).date()
-            base_local_midnight = datetime.combine(tomorrow_date, datetime.min.time(), tzinfo=TZ_KYIV)
-            minutes_into_tomorrow = (pos - len(today_tail)) * 30
-            next_local = base_local_midnight + timedelta(minutes=minutes_into_tomorrow)
 
-        return dt_util.as_utc(next_local).isoformat()
+def _queue_sort_key(queue: str) -> tuple[Any, ...]:
+    """Natural order of queue names ("1.2" < "10.1"); non-numeric parts go last."""
+    try:
+        return (0, *(int(part) for part in queue.split(".")))
+    except ValueError:
+        return (1, queue)
+
+
+class SvitloRegionCoordinator(SvitloCoordinator):
+    """Один координатор на всі черги регіону (запис "всі черги").
+
+    Маршрут, підписка на хаб і точний таймер — одні на регіон. Усі черги
+    розбираються за один прохід по region_obj["schedule"], а готові дані
+    штовхаються в легкі дочірні координатори черг (без власних таймерів,
+    підписок і запитів), на яких тримаються набори сутностей.
+    """
+
+    def __init__(self, hass: HomeAssistant, config: dict[str, Any], hub: Any) -> None:
+        super().__init__(hass, config, hub)
+        self._config = dict(config)
+        self._queues: dict[str, SvitloQueueCoordinator] = {}
+        # Агрегати по всіх чергах; перераховуються лише при зміні версії графіка будь-якої черги
+        self.region_stats: Optional[RegionStats] = None
+        self._region_stats_key: Optional[tuple] = None
+        self.async_add_listener(self._async_push_to_queues)
+
+    def queue_coordinators(self) -> list[SvitloCoordinator]:
+        return list(self._queues.values())
+
+    def coordinator_for_unique_id(self, unique_id: str) -> Optional[SvitloCoordinator]:
+        for child in self._queues.values():
+            if unique_id.endswith(f"_{self.region}_{child.queue}"):
+                return child
+        return None
+
+    def _build_from_api(self, api: dict[str, Any]) -> dict[str, Any]:
+        region_obj = self.hub.get_region(self.is_new_api, self.api_region_key)
+        if not region_obj:
+            raise RegionNotFound(f"Region '{self.api_region_key}' not found in API response")
+
+        # Черги, що зникли з payload, лишаються (отримають "nosched")
+        queues = set(region_obj.get("schedule") or {}) | set(self._queues)
+        data: dict[str, Any] = {}
+        for queue in sorted(queues, key=_queue_sort_key):
+            child = self._queues.get(queue)
+            if child is None:
+                child = self._queues[queue] = SvitloQueueCoordinator(self, queue)
+            child.is_new_api = self.is_new_api
+            child.api_region_key = self.api_region_key
+            data[queue] = child._build_from_api(api)
+        self._update_region_stats(data)
+        return data
+
+    def _update_region_stats(self, data: dict[str, Any]) -> None:
+        key = tuple((queue, payload.get("date"), payload.get("schedule_version")) for queue, payload in data.items())
+        if key == self._region_stats_key:
+            return
+        self.region_stats = compute_region_stats({
+            queue: (payload.get("today_48half") or EMPTY_DAY, payload.get("tomorrow_48half") or EMPTY_DAY)
+            for queue, payload in data.items()
+        })
+        self._region_stats_key = key
+
+    def _next_transition(self, data: dict[str, Any]) -> Optional[datetime]:
+        candidates = [
+            when
+            for child in self._queues.values()
+            if child.queue in data and (when := child._next_transition(data[child.queue]))
+        ]
+        return min(candidates, default=None)
+
+    @callback
+    def _async_push_to_queues(self) -> None:
+        if not self.last_update_success:
+            # Помилка батька — помилка кожної черги (сутності стають недоступними)
+            error = self.last_exception or UpdateFailed(f"Region {self.region} update failed")
+            for child in self._queues.values():
+                child.async_set_update_error(error)
+            return
+        for queue, payload in (self.data or {}).items():
+            if child := self._queues.get(queue):
+                child.async_set_updated_data(payload)
+
+
+class SvitloQueueCoordinator(SvitloCoordinator):
+    """Дані однієї черги в записі "всі черги"; наповнюється батьківським координатором."""
+
+    def __init__(self, parent: SvitloRegionCoordinator, queue: str) -> None:
+        super().__init__(parent.hass, {**parent._config, CONF_QUEUE: queue}, parent.hub)
+        self._parent = parent
+        self.is_new_api = parent.is_new_api
+        self.api_region_key = parent.api_region_key
+        self._route_version = parent._route_version
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        # Оновлення сутності (update_entity) — через батьківський координатор
+        await self._parent.async_refresh()
+        payload = (self._parent.data or {}).get(self.queue)
+        if payload is None:
+            raise UpdateFailed(f"Queue {self.queue} is missing from region {self.region}")
+        return payload
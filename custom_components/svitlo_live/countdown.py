@@ -0,0 +1,75 @@
+"""Shared countdown scheduler for the time-to-event sensors."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Callable, Optional
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# action(now) -> час наступного пробудження (або None, якщо більше не потрібно)
+TickAction = Callable[[datetime], Optional[datetime]]
+
+
+class CountdownScheduler:
+    """One timer per hub that wakes subscribed entities at their next value boundary.
+
+    Замість окремого async_track_time_interval у кожній сутності тримаємо
+    один таймер на найближчий момент, коли хоч одне значення зміниться.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._due: dict[TickAction, datetime] = {}
+        self._unsub_timer: Optional[CALLBACK_TYPE] = None
+        self._timer_at: Optional[datetime] = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._due)
+
+    @callback
+    def async_schedule(self, action: TickAction, when: Optional[datetime]) -> None:
+        """(Re)schedule `action` for `when`; None cancels it."""
+        if when is None:
+            self._due.pop(action, None)
+        else:
+            self._due[action] = when
+        self._async_arm()
+
+    @callback
+    def async_cancel(self, action: TickAction) -> None:
+        self.async_schedule(action, None)
+
+    @callback
+    def _async_arm(self) -> None:
+        earliest = min(self._due.values(), default=None)
+        if earliest == self._timer_at:
+            return
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._timer_at = earliest
+        if earliest is not None:
+            self._unsub_timer = async_track_point_in_utc_time(self.hass, self._async_fire, earliest)
+
+    @callback
+    def _async_fire(self, _now: datetime) -> None:
+        self._unsub_timer = None
+        self._timer_at = None
+        now = dt_util.utcnow()
+        due = [action for action, when in self._due.items() if when <= now]
+        for action in due:
+            self._due.pop(action, None)
+            try:
+                when = action(now)
+            except Exception:  # одна сутність не повинна зупиняти решту
+                _LOGGER.exception("Countdown tick failed")
+                continue
+            if when is not None:
+                self._due[action] = when
+        self._async_arm()
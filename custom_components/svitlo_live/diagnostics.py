@@ -7,9 +7,10 @@ from homeassistant.components.diagnostics import async_redact_data
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN, CONF_REGION, CONF_QUEUE
+from .const import DOMAIN, CONF_REGION, CONF_QUEUE, CONF_ICS_TOKEN, QUEUE_ALL
+from .schedule import export_payload
 
-REDACT_CONFIG = {CONF_REGION, CONF_QUEUE}
+REDACT_CONFIG = {CONF_REGION, CONF_QUEUE, CONF_ICS_TOKEN}
 REDACT_DATA = {"cpu", "name_ua", "name_en"}
 
 async def async_get_config_entry_diagnostics(
@@ -21,13 +22,23 @@ async def async_get_config_entry_diagnostics(
 
     diagnostics_data = {
         "entry": async_redact_data(entry.as_dict(), REDACT_CONFIG),
-        "coordinator_data": coordinator.data,
+        "coordinator_data": (
+            export_payload(coordinator.data)
+            if entry.data.get(CONF_QUEUE) != QUEUE_ALL
+            else {c.queue: export_payload(c.data) for c in coordinator.queue_coordinators()}
+        ),
         "hub_stats": {
             "last_fetch_old": hub._last_fetch_old.isoformat() if hub._last_fetch_old else None,
             "last_fetch_new": hub._last_fetch_new.isoformat() if hub._last_fetch_new else None,
             "etags_count": len(hub._etags),
             "last_modified_count": len(hub._last_modified),
             "cache_ttl_seconds": hub._cache_ttl.total_seconds(),
+            "stale_ttl_seconds": hub._stale_ttl.total_seconds(),
+            "cache_stats": dict(hub._stats),
+            "polling": hub.polling_state(),
+            "circuit_breakers": hub.breaker_state(),
+            "loop_blocking": hub.loop_blocking_state(),
+            "transfer": hub.transfer_state(),
         },
         "api_urls": {
             "is_new_api": coordinator.is_new_api,
@@ -0,0 +1,183 @@
+"""On-disk archive of outage intervals per region/queue, sharded by month."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, tzinfo
+from typing import Any, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ARCHIVE_STORAGE_KEY,
+    ARCHIVE_STORAGE_VERSION,
+    ARCHIVE_RETENTION_MONTHS,
+    ARCHIVE_CACHE_MONTHS,
+    STORAGE_SAVE_DELAY,
+)
+from .schedule import STATE_OFF, DaySchedule, Segment, slot_start_utc
+
+_LOGGER = logging.getLogger(__name__)
+
+# {"<region>|<queue>": {"YYYY-MM-DD": [[first_slot, end_slot], ...]}}
+MonthData = dict[str, dict[str, list[list[int]]]]
+
+
+def _month_of(day: date) -> str:
+    return day.isoformat()[:7]
+
+
+def _months_between(start: date, end: date) -> list[str]:
+    months: list[str] = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+class OutageArchive:
+    """Final outage intervals of every recorded day, kept on disk.
+
+    Один файл .storage на місяць; у пам'яті тримаємо лише кілька останніх
+    прочитаних місяців (LRU) плюс місяці, в які зараз відбувається запис.
+    Для кожного дня зберігається остання відома версія графіка.
+    """
+
+    def __init__(self, hass: HomeAssistant, tz: tzinfo) -> None:
+        self.hass = hass
+        self._tz = tz
+        # Перелік місяців, які є на диску
+        self._index_store: Store = Store(hass, ARCHIVE_STORAGE_VERSION, ARCHIVE_STORAGE_KEY)
+        self._months_on_disk: set[str] = set()
+        self._load_task: Optional[asyncio.Task] = None
+        self._stores: dict[str, Store] = {}
+        self._months: OrderedDict[str, MonthData] = OrderedDict()
+        self._month_tasks: dict[str, asyncio.Task] = {}
+
+    async def async_load(self) -> None:
+        if self._load_task is None:
+            self._load_task = self.hass.async_create_task(self._async_load_index())
+        await asyncio.shield(self._load_task)
+
+    async def _async_load_index(self) -> None:
+        try:
+            stored = await self._index_store.async_load()
+        except Exception as e:
+            _LOGGER.warning("Failed to load Svitlo outage archive index: %s", e)
+            return
+        if isinstance(stored, dict):
+            self._months_on_disk.update(m for m in stored.get("months") or [] if isinstance(m, str))
+        await self._async_prune()
+
+    @callback
+    def async_record(self, key: str, day: str, schedule: DaySchedule) -> None:
+        """Archive the outage runs of one day (replaces the previous version of that day)."""
+        if not schedule or schedule.is_unknown:
+            return
+        runs = [[start, end] for start, end in schedule.off_runs()]
+        self.hass.async_create_task(self._async_record(key, day, runs))
+
+    async def _async_record(self, key: str, day: str, runs: list[list[int]]) -> None:
+        await self.async_load()
+        month = day[:7]
+        data = await self._async_month(month)
+        days = data.setdefault(key, {})
+        if days.get(day) == runs:
+            return
+        days[day] = runs
+        self._store(month).async_delay_save(lambda: data, STORAGE_SAVE_DELAY)
+
+        if month not in self._months_on_disk:
+            self._months_on_disk.add(month)
+            self._index_store.async_delay_save(self._index_to_store, STORAGE_SAVE_DELAY)
+            await self._async_prune()
+
+    async def async_intervals(self, key: str, start: date, end: date) -> list[Segment]:
+        """Archived outages (UTC) of local days in [start, end]; runs across midnight are merged."""
+        await self.async_load()
+        segments: list[Segment] = []
+        for month in _months_between(start, end):
+            if month not in self._months_on_disk:
+                continue
+            days = (await self._async_month(month)).get(key, {})
+            for day in sorted(days):
+                day_date = date.fromisoformat(day)
+                if not start <= day_date <= end:
+                    continue
+                midnight = datetime.combine(day_date, time.min, tzinfo=self._tz)
+                for first, last in days[day]:
+                    seg = Segment(slot_start_utc(midnight, first), slot_start_utc(midnight, last), STATE_OFF)
+                    if segments and segments[-1].end == seg.start:
+                        segments[-1] = Segment(segments[-1].start, seg.end, STATE_OFF)
+                    else:
+                        segments.append(seg)
+            self._evict()
+        return segments
+
+    def _store(self, month: str) -> Store:
+        if month not in self._stores:
+            self._stores[month] = Store(
+                self.hass, ARCHIVE_STORAGE_VERSION, f"{ARCHIVE_STORAGE_KEY}.{month}"
+            )
+        return self._stores[month]
+
+    async def _async_month(self, month: str) -> MonthData:
+        if month in self._months:
+            self._months.move_to_end(month)
+            return self._months[month]
+        if month not in self._month_tasks:
+            self._month_tasks[month] = self.hass.async_create_task(self._async_load_month(month))
+        try:
+            data = await asyncio.shield(self._month_tasks[month])
+        finally:
+            self._month_tasks.pop(month, None)
+        self._months[month] = data
+        return data
+
+    async def _async_load_month(self, month: str) -> MonthData:
+        if month not in self._months_on_disk:
+            return {}
+        try:
+            stored = await self._store(month).async_load()
+        except Exception as e:
+            _LOGGER.warning("Failed to load Svitlo outage archive %s: %s", month, e)
+            return {}
+        return stored if isinstance(stored, dict) else {}
+
+    def _pinned_months(self) -> set[str]:
+        # Місяці, в які може писати координатор (вчора/сьогодні/завтра)
+        today = dt_util.now(self._tz).date()
+        return {_month_of(today + timedelta(days=delta)) for delta in (-1, 0, 1)}
+
+    def _evict(self) -> None:
+        pinned = self._pinned_months()
+        for month in list(self._months):
+            if len(self._months) <= ARCHIVE_CACHE_MONTHS:
+                break
+            if month not in pinned:
+                # Store лишається: його відкладений запис ще може бути в черзі,
+                # а повторне завантаження має йти через той самий об'єкт
+                del self._months[month]
+
+    async def _async_prune(self) -> None:
+        """Remove month files older than the retention window."""
+        today = dt_util.now(self._tz).date()
+        year, month = divmod(today.year * 12 + today.month - 1 - ARCHIVE_RETENTION_MONTHS, 12)
+        cutoff = f"{year:04d}-{month + 1:02d}"
+        expired = sorted(m for m in self._months_on_disk if m < cutoff)
+        if not expired:
+            return
+        for month in expired:
+            self._months_on_disk.discard(month)
+            self._months.pop(month, None)
+            await self._store(month).async_remove()
+            self._stores.pop(month, None)
+        self._index_store.async_delay_save(self._index_to_store, STORAGE_SAVE_DELAY)
+        _LOGGER.debug("Pruned outage archive months: %s", ", ".join(expired))
+
+    def _index_to_store(self) -> dict[str, Any]:
+        return {"months": sorted(self._months_on_disk)}
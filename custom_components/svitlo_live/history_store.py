@@ -0,0 +1,210 @@
+"""Persistent, bounded store of schedule revisions per region/queue."""
+from __future__ import annotations
+
+import asyncio
+import base64
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    CONF_REGION,
+    CONF_QUEUE,
+    QUEUE_ALL,
+    CONF_HISTORY_RETENTION_DAYS,
+    DEFAULT_HISTORY_RETENTION_DAYS,
+    HISTORY_STORAGE_KEY,
+    HISTORY_STORAGE_VERSION,
+    HISTORY_MAX_REVISIONS_PER_DAY,
+    STORAGE_SAVE_DELAY,
+)
+from .schedule import SLOTS_PER_DAY, DaySchedule
+
+_LOGGER = logging.getLogger(__name__)
+
+_PACKED_LEN = SLOTS_PER_DAY // 4
+
+TZ_KYIV = dt_util.get_time_zone("Europe/Kyiv")
+
+
+def _pack(codes: bytes) -> bytes:
+    """48 slot codes (0..2) -> 12 bytes, 2 bits per slot."""
+    out = bytearray(_PACKED_LEN)
+    for i, code in enumerate(codes[:SLOTS_PER_DAY]):
+        out[i >> 2] |= (code & 0b11) << ((i & 3) * 2)
+    return bytes(out)
+
+
+def _unpack(packed: bytes) -> bytes:
+    return bytes((packed[i >> 2] >> ((i & 3) * 2)) & 0b11 for i in range(SLOTS_PER_DAY))
+
+
+def _xor(a: bytes, b: bytes) -> bytes:
+    return bytes(x ^ y for x, y in zip(a, b))
+
+
+class ScheduleHistoryStore:
+    """Append-only history of schedule revisions, delta-encoded per day.
+
+    Формат: {"<region>|<queue>": {"YYYY-MM-DD": [[unix_ts, "<base64>"], ...]}}.
+    Кожна ревізія — 2-бітна бітова карта 48 слотів, XOR-нута з попередньою
+    ревізією того ж дня (перша — з нулями), тобто 16 символів base64.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._store: Store = Store(hass, HISTORY_STORAGE_VERSION, HISTORY_STORAGE_KEY)
+        self._data: dict[str, dict[str, list[list[Any]]]] = {}
+        # Останній декодований стан (packed) для (key, day) — для дедуплікації
+        self._last: dict[tuple[str, str], bytes] = {}
+        self._load_task: Optional[asyncio.Task] = None
+
+    async def async_load(self) -> None:
+        if self._load_task is None:
+            self._load_task = self.hass.async_create_task(self._async_load_store())
+        await asyncio.shield(self._load_task)
+
+    async def _async_load_store(self) -> None:
+        try:
+            stored = await self._store.async_load()
+        except Exception as e:
+            _LOGGER.warning("Failed to load Svitlo schedule history: %s", e)
+            return
+        if isinstance(stored, dict):
+            for key, days in stored.items():
+                if isinstance(days, dict):
+                    self._data.setdefault(key, {}).update(days)
+        if self._evict_expired():
+            self._store.async_delay_save(lambda: self._data, STORAGE_SAVE_DELAY)
+
+    @callback
+    def async_record(
+        self,
+        key: str,
+        day: str,
+        schedule: DaySchedule,
+        at: Optional[datetime] = None,
+    ) -> bool:
+        """Append a revision if it differs from the last one for that day.
+
+        Термін зберігання береться з налаштувань записів (див. _retention_by_key),
+        а не від того, хто записує: ключ region|queue спільний для кількох записів.
+        """
+        if not schedule or len(schedule) != SLOTS_PER_DAY:
+            return False
+        packed = _pack(schedule.codes)
+        previous = self._last_packed(key, day)
+        if previous == packed:
+            return False
+
+        at = at or dt_util.utcnow()
+        delta = _xor(packed, previous or bytes(_PACKED_LEN))
+        revisions = self._data.setdefault(key, {}).setdefault(day, [])
+        revisions.append([int(at.timestamp()), base64.b64encode(delta).decode()])
+        self._last[(key, day)] = packed
+
+        self._cap_revisions(key, day)
+        self._evict_expired()
+        self._store.async_delay_save(lambda: self._data, STORAGE_SAVE_DELAY)
+        return True
+
+    def revisions(self, key: str, start: date, end: date) -> list[dict[str, Any]]:
+        """Decoded revisions for dates in [start, end], oldest first."""
+        result: list[dict[str, Any]] = []
+        for day in sorted(self._data.get(key, {})):
+            try:
+                day_date = date.fromisoformat(day)
+            except ValueError:
+                continue
+            if not start <= day_date <= end:
+                continue
+            result.append({
+                "date": day,
+                "revisions": [
+                    {
+                        "at": dt_util.utc_from_timestamp(ts).isoformat(),
+                        "48half": DaySchedule(_unpack(packed)).to_list(),
+                    }
+                    for ts, packed in self._decode_day(key, day)
+                ],
+            })
+        return result
+
+    def _decode_day(self, key: str, day: str) -> list[tuple[int, bytes]]:
+        state = bytes(_PACKED_LEN)
+        decoded: list[tuple[int, bytes]] = []
+        for ts, delta_b64 in self._data.get(key, {}).get(day, []):
+            state = _xor(state, base64.b64decode(delta_b64))
+            decoded.append((ts, state))
+        return decoded
+
+    def _last_packed(self, key: str, day: str) -> Optional[bytes]:
+        if (key, day) not in self._last:
+            decoded = self._decode_day(key, day)
+            if not decoded:
+                return None
+            self._last[(key, day)] = decoded[-1][1]
+        return self._last[(key, day)]
+
+    def _retention_by_key(self) -> dict[str, int]:
+        """Retention (days) of every stored key: the max among config entries sharing it.
+
+        Ключі без жодного запису (видалені записи/регіони, змінена черга) у
+        результат не потрапляють і видаляються повністю.
+        """
+        exact: dict[str, int] = {}
+        region_wide: dict[str, int] = {}
+        for entry in self.hass.config_entries.async_entries(DOMAIN):
+            region, queue = entry.data.get(CONF_REGION), entry.data.get(CONF_QUEUE)
+            days = int(entry.options.get(CONF_HISTORY_RETENTION_DAYS, DEFAULT_HISTORY_RETENTION_DAYS))
+            if queue == QUEUE_ALL:
+                region_wide[region] = max(days, region_wide.get(region, 0))
+            else:
+                key = f"{region}|{queue}"
+                exact[key] = max(days, exact.get(key, 0))
+
+        retention: dict[str, int] = {}
+        for key in self._data:
+            days = max(exact.get(key, 0), region_wide.get(key.split("|", 1)[0], 0))
+            if days:
+                retention[key] = days
+        return retention
+
+    def _evict_expired(self) -> bool:
+        """Drop orphan keys and days outside their key's retention window (all keys)."""
+        retention = self._retention_by_key()
+        today = dt_util.now(TZ_KYIV).date()
+        changed = False
+        for key in list(self._data):
+            days = self._data[key]
+            if key not in retention:
+                old_days = list(days)
+            else:
+                cutoff = (today - timedelta(days=retention[key])).isoformat()
+                old_days = [d for d in days if d < cutoff]
+            for old_day in old_days:
+                days.pop(old_day, None)
+                self._last.pop((key, old_day), None)
+            if not days:
+                self._data.pop(key, None)
+            changed = changed or bool(old_days)
+        return changed
+
+    def _cap_revisions(self, key: str, day: str) -> None:
+        """Keep at most HISTORY_MAX_REVISIONS_PER_DAY revisions of one day."""
+        days = self._data.get(key, {})
+        revisions = days.get(day)
+        if revisions and len(revisions) > HISTORY_MAX_REVISIONS_PER_DAY:
+            # Найстаріші ревізії відкидаємо, перша з решти стає повною (XOR з нулями)
+            decoded = self._decode_day(key, day)[-HISTORY_MAX_REVISIONS_PER_DAY:]
+            prev = bytes(_PACKED_LEN)
+            rebuilt: list[list[Any]] = []
+            for ts, packed in decoded:
+                rebuilt.append([ts, base64.b64encode(_xor(packed, prev)).decode()])
+                prev = packed
+            days[day] = rebuilt
@@ -0,0 +1,133 @@
+"""iCalendar (ICS) feed of outage events, pre-rendered once per schedule version."""
+from __future__ import annotations
+
+import gzip
+import hashlib
+from datetime import datetime
+from http import HTTPStatus
+from typing import Iterable, NamedTuple
+
+from aiohttp import web
+
+from homeassistant.components.calendar import CalendarEvent
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+ICS_CONTENT_TYPE = "text/calendar"
+
+
+class IcsFeed(NamedTuple):
+    """Rendered feed: identity and gzip bodies with their ETags."""
+
+    body: bytes
+    etag: str
+    gzip_body: bytes
+    gzip_etag: str
+
+
+def _escape(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets (RFC 5545 §3.1) without splitting UTF-8 characters."""
+    out: list[str] = []
+    current, size = "", 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > 75:
+            out.append(current)
+            current, size = " ", 1
+        current += char
+        size += width
+    out.append(current)
+    return "\r\n".join(out)
+
+
+def _utc(value: datetime) -> str:
+    return dt_util.as_utc(value).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_feed(name: str, uid_prefix: str, events: Iterable[CalendarEvent]) -> IcsFeed:
+    """Serialize events into a VCALENDAR and pre-compress it."""
+    stamp = _utc(dt_util.utcnow())
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//svitlo_live//Outages//UK",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(name)}",
+    ]
+    for event in events:
+        start = _utc(event.start)
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{uid_prefix}-{start}@{DOMAIN}",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{start}",
+            f"DTEND:{_utc(event.end)}",
+            f"SUMMARY:{_escape(event.summary)}",
+        ]
+        if event.description:
+            lines.append(f"DESCRIPTION:{_escape(event.description)}")
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+
+    body = ("\r\n".join(_fold(line) for line in lines) + "\r\n").encode()
+    digest = hashlib.sha1(body).hexdigest()[:16]
+    return IcsFeed(
+        body=body,
+        etag=f'"{digest}"',
+        # mtime=0: однаковий вміст — однакові байти
+        gzip_body=gzip.compress(body, mtime=0),
+        gzip_etag=f'"{digest}-gzip"',
+    )
+
+
+class SvitloIcsView(HomeAssistantView):
+    """GET /api/svitlo_live/ics/{token} — outage calendar of one config entry.
+
+    Без авторизації, щоб на фід можна було підписатися з телефону чи
+    зовнішнього календаря: доступ дає випадковий токен запису (CONF_ICS_TOKEN),
+    який не з'являється ні в реєстрах, ні в діагностиці. Повний шлях фіду —
+    в атрибуті календаря ics_path.
+    """
+
+    url = f"/api/{DOMAIN}/ics/{{token}}"
+    name = f"api:{DOMAIN}:ics"
+    requires_auth = False
+
+    async def get(self, request: web.Request, token: str) -> web.Response:
+        hass = request.app["hass"]
+        calendar = hass.data.get(DOMAIN, {}).get("calendars", {}).get(token.removesuffix(".ics"))
+        if calendar is None:
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+
+        feed = await calendar.async_ics_feed()
+        use_gzip = "gzip" in request.headers.get("Accept-Encoding", "")
+        etag = feed.gzip_etag if use_gzip else feed.etag
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "private, max-age=300",
+            "Vary": "Accept-Encoding",
+        }
+
+        # Будь-яке з наших ETag (із/без gzip) означає, що вміст у клієнта актуальний
+        if_none_match = request.headers.get("If-None-Match", "")
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in tags or feed.etag in tags or feed.gzip_etag in tags:
+            return web.Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+        return web.Response(
+            body=feed.gzip_body if use_gzip else feed.body,
+            content_type=ICS_CONTENT_TYPE,
+            charset="utf-8",
+            headers=headers,
+        )
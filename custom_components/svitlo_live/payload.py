@@ -0,0 +1,132 @@
+"""Decoding of the DTEK worker response with region filtering."""
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Iterable, Optional
+
+try:  # Home Assistant ships orjson; fall back to the stdlib elsewhere
+    import orjson
+
+    json_loads: Callable[[Any], Any] = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:  # pragma: no cover - depends on the environment
+    json_loads = json.loads
+    JSON_BACKEND = "json"
+
+_DECODER = json.JSONDecoder()
+_WS = " \t\n\r"
+
+# Розклади (день -> слоти) зберігаємо лише для відстежуваних регіонів;
+# в інших лишаються тільки назви черг (для каталогу) і позначка PRUNED_KEY.
+SCHEDULE_KEY = "schedule"
+PRUNED_KEY = "_schedule_pruned"
+
+# З такого розміру body розбирається по одному регіону (stdlib), навіть з orjson:
+# повний розбір orjson спершу будує розклади всіх регіонів, і пік пам'яті вищий,
+# ніж у старого шляху. Такі відповіді й так декодуються в executor
+# (const.EXECUTOR_DECODE_THRESHOLD), тож повільніший розбір не блокує event loop.
+STREAM_DECODE_MIN_BYTES = 256 * 1024
+
+
+def prune_region(region: Any) -> None:
+    """Drop day maps of a region in place, keeping its queue names."""
+    if not isinstance(region, dict):
+        return
+    schedule = region.get(SCHEDULE_KEY)
+    if isinstance(schedule, dict):
+        region[SCHEDULE_KEY] = {queue: {} for queue in schedule}
+        region[PRUNED_KEY] = True
+
+
+def decode_envelope(raw: bytes) -> dict[str, Any]:
+    """Decode the outer worker envelope (`{"body": "<json string>", ...}`)."""
+    data = json_loads(raw)
+    return data if isinstance(data, dict) else {}
+
+
+def decode_body(envelope: dict[str, Any], wanted: Optional[Iterable[str]] = None) -> dict[str, Any]:
+    """Decode the inner payload, keeping schedules only for `wanted` region cpus.
+
+    Інші регіони лишаються без денних слотів (каталогу регіонів потрібні
+    лише їхні id, назви та черги). wanted=None — повний payload.
+    """
+    body = envelope.get("body")
+    if not body:
+        return envelope
+    if wanted is None:
+        return json_loads(body)
+
+    wanted = set(wanted)
+    if JSON_BACKEND == "orjson" and len(body) < STREAM_DECODE_MIN_BYTES:
+        # Невеликий body: orjson розбирає весь документ швидше за покроковий парсер
+        return _decode_pruned(body, wanted)
+    return _decode_filtered(body, wanted)
+
+
+def _decode_pruned(body: str, wanted: set[str]) -> dict[str, Any]:
+    """Decode the whole body at once, then prune regions outside `wanted`."""
+    data = json_loads(body)
+    for region in data.get("regions") or []:
+        if isinstance(region, dict) and region.get("cpu") not in wanted:
+            prune_region(region)
+    return data
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos] in _WS:
+        pos += 1
+    return pos
+
+
+def _expect(text: str, pos: int, char: str) -> int:
+    pos = _skip_ws(text, pos)
+    if pos >= len(text) or text[pos] != char:
+        raise ValueError(f"Expected {char!r} at position {pos}")
+    return pos + 1
+
+
+def _decode_filtered(body: str, wanted: set[str]) -> dict[str, Any]:
+    """Walk the top-level object and decode `regions` one element at a time.
+
+    Кожен регіон декодується окремо (C-сканер stdlib json) і одразу
+    "обрізається", тож у пам'яті ніколи не живуть розклади всіх регіонів.
+    """
+    result: dict[str, Any] = {}
+    pos = _expect(body, 0, "{")
+    pos = _skip_ws(body, pos)
+    if body.startswith("}", pos):
+        return result
+
+    while True:
+        key, pos = _DECODER.raw_decode(body, _skip_ws(body, pos))
+        pos = _expect(body, pos, ":")
+        pos = _skip_ws(body, pos)
+
+        if key == "regions" and body.startswith("[", pos):
+            regions, pos = _decode_regions(body, pos, wanted)
+            result[key] = regions
+        else:
+            result[key], pos = _DECODER.raw_decode(body, pos)
+
+        pos = _skip_ws(body, pos)
+        if body.startswith("}", pos):
+            return result
+        pos = _expect(body, pos, ",")
+
+
+def _decode_regions(body: str, pos: int, wanted: set[str]) -> tuple[list[Any], int]:
+    regions: list[Any] = []
+    pos = _skip_ws(body, pos + 1)
+    if body.startswith("]", pos):
+        return regions, pos + 1
+
+    while True:
+        region, pos = _DECODER.raw_decode(body, _skip_ws(body, pos))
+        if isinstance(region, dict) and region.get("cpu") not in wanted:
+            prune_region(region)
+        regions.append(region)
+
+        pos = _skip_ws(body, pos)
+        if body.startswith("]", pos):
+            return regions, pos + 1
+        pos = _expect(body, pos, ",")
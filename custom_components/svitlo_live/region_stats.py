@@ -0,0 +1,98 @@
+"""Region-wide aggregates over all queues (queues x 96 half-hour slots)."""
+from __future__ import annotations
+
+from typing import NamedTuple, Optional
+
+from .schedule import SLOTS_PER_DAY, STATE_OFF, DaySchedule
+
+try:  # NumPy робить агрегацію однією матричною операцією; без неї — чистий Python
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+STATS_BACKEND = "numpy" if np is not None else "python"
+
+
+class DayStats(NamedTuple):
+    """Aggregates of one day across the queues that have a schedule for it."""
+
+    queues_with_schedule: int
+    off_percent: tuple[float, ...]  # 48 slots, % of those queues without power
+    total_outage_hours: float
+    worst_queue: Optional[str]
+    worst_queue_hours: Optional[float]
+
+
+class RegionStats(NamedTuple):
+    queues: int
+    today: DayStats
+    tomorrow: Optional[DayStats]
+
+
+def _row(day: DaySchedule) -> bytes:
+    codes = day.codes if day else b""
+    return codes[:SLOTS_PER_DAY].ljust(SLOTS_PER_DAY, b"\0")
+
+
+def compute_region_stats(days: dict[str, tuple[DaySchedule, DaySchedule]]) -> RegionStats:
+    """Aggregate `{queue: (today, tomorrow)}` in one batch.
+
+    Матриця queues x 96: перші 48 слотів — сьогодні, наступні 48 — завтра.
+    Порядок черг зберігається (для "найгіршої" черги при рівності годин).
+    """
+    queues = list(days)
+    rows = [_row(today) + _row(tomorrow) for today, tomorrow in days.values()]
+    has_day = [
+        (bool(today) and not today.is_unknown, bool(tomorrow) and not tomorrow.is_unknown)
+        for today, tomorrow in days.values()
+    ]
+    if np is not None and rows:
+        off_counts, off_hours = _aggregate_numpy(rows)
+    else:
+        off_counts, off_hours = _aggregate_python(rows)
+
+    def _day(offset: int) -> DayStats:
+        which = offset // SLOTS_PER_DAY
+        members = [i for i, flags in enumerate(has_day) if flags[which]]
+        if not members:
+            return DayStats(0, (), 0.0, None, None)
+        hours = [off_hours[i][which] for i in members]
+        worst = max(range(len(members)), key=lambda k: hours[k])
+        # Черги без графіка на цей день не мають відключень у матриці (нулі)
+        counts = off_counts[offset:offset + SLOTS_PER_DAY]
+        return DayStats(
+            queues_with_schedule=len(members),
+            off_percent=tuple(round(100 * c / len(members), 1) for c in counts),
+            total_outage_hours=sum(hours),
+            worst_queue=queues[members[worst]] if hours[worst] > 0 else None,
+            worst_queue_hours=hours[worst],
+        )
+
+    tomorrow = _day(SLOTS_PER_DAY)
+    return RegionStats(
+        queues=len(queues),
+        today=_day(0),
+        tomorrow=tomorrow if tomorrow.queues_with_schedule else None,
+    )
+
+
+def _aggregate_numpy(rows: list[bytes]) -> tuple[list[int], list[tuple[float, float]]]:
+    matrix = np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(len(rows), 2 * SLOTS_PER_DAY)
+    off = matrix == STATE_OFF
+    per_slot = off.sum(axis=0)
+    per_queue = off.reshape(len(rows), 2, SLOTS_PER_DAY).sum(axis=2) * 0.5
+    return per_slot.tolist(), [tuple(r) for r in per_queue.tolist()]
+
+
+def _aggregate_python(rows: list[bytes]) -> tuple[list[int], list[tuple[float, float]]]:
+    per_slot = [0] * (2 * SLOTS_PER_DAY)
+    per_queue: list[tuple[float, float]] = []
+    for row in rows:
+        for i, code in enumerate(row):
+            if code == STATE_OFF:
+                per_slot[i] += 1
+        per_queue.append((
+            row.count(STATE_OFF, 0, SLOTS_PER_DAY) * 0.5,
+            row.count(STATE_OFF, SLOTS_PER_DAY) * 0.5,
+        ))
+    return per_slot, per_queue
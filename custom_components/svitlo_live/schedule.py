@@ -0,0 +1,360 @@
+"""Compact half-hour schedule types shared by the coordinator and entities."""
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import Any, Iterator, NamedTuple, Optional
+
+# Коди станів збігаються з кодами API: 1 = світло є, 2 = відключення, інше = невідомо
+STATE_UNKNOWN = 0
+STATE_ON = 1
+STATE_OFF = 2
+
+STATE_NAMES = ("unknown", "on", "off")
+STATE_CODES = {name: code for code, name in enumerate(STATE_NAMES)}
+
+SLOTS_PER_DAY = 48
+SLOT_LABELS = tuple(f"{h:02d}:{m:02d}" for h in range(24) for m in (0, 30))
+
+_OFF_RUN = re.compile(bytes([STATE_OFF]) + b"+")
+
+
+class DaySchedule:
+    """Immutable 48-slot day stored as one byte per half hour.
+
+    Порожній розклад (len == 0) означає "графіка немає" і є falsy,
+    як і порожній список у старому форматі.
+    """
+
+    __slots__ = ("_codes", "on_count", "off_count")
+
+    def __init__(self, codes: bytes = b"") -> None:
+        self._codes = bytes(codes)
+        self.on_count = self._codes.count(STATE_ON)
+        self.off_count = self._codes.count(STATE_OFF)
+
+    @classmethod
+    def from_slots_map(cls, slots_map: dict[str, Any]) -> DaySchedule:
+        """Build from the API `{"HH:MM": code}` map; unknown codes become STATE_UNKNOWN."""
+        codes = bytearray(SLOTS_PER_DAY)
+        for i, label in enumerate(SLOT_LABELS):
+            code = int(slots_map.get(label, 0))
+            if code == STATE_ON or code == STATE_OFF:
+                codes[i] = code
+        return cls(codes)
+
+    @classmethod
+    def from_states(cls, states: list[str]) -> DaySchedule:
+        """Build from a legacy `["on", "off", "unknown", ...]` list."""
+        return cls(bytes(STATE_CODES.get(s, STATE_UNKNOWN) for s in states))
+
+    @property
+    def codes(self) -> bytes:
+        return self._codes
+
+    @property
+    def is_unknown(self) -> bool:
+        """True if there are no known slots at all."""
+        return not (self.on_count or self.off_count)
+
+    @property
+    def outage_hours(self) -> float:
+        return self.off_count * 0.5
+
+    def code_at(self, idx: int) -> int:
+        return self._codes[idx]
+
+    def state_at(self, idx: int) -> str:
+        """State name of one slot, "unknown" when out of range."""
+        if 0 <= idx < len(self._codes):
+            return STATE_NAMES[self._codes[idx]]
+        return "unknown"
+
+    def off_runs(self) -> list[tuple[int, int]]:
+        """Outage runs as `(first_slot, end_slot)` pairs, end exclusive."""
+        return [m.span() for m in _OFF_RUN.finditer(self._codes)]
+
+    def to_list(self) -> list[str]:
+        """Legacy list of state names (used only at the attribute boundary)."""
+        return [STATE_NAMES[c] for c in self._codes]
+
+    def __getitem__(self, idx: int) -> str:
+        return STATE_NAMES[self._codes[idx]]
+
+    def __iter__(self) -> Iterator[str]:
+        return (STATE_NAMES[c] for c in self._codes)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, DaySchedule):
+            return self._codes == other._codes
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._codes)
+
+    def __repr__(self) -> str:
+        return f"DaySchedule(on={self.on_count}, off={self.off_count}, slots={len(self._codes)})"
+
+
+EMPTY_DAY = DaySchedule()
+
+
+def longest_off_hours(*days: DaySchedule) -> float:
+    """Longest consecutive outage (hours) across the given days concatenated."""
+    codes = b"".join(d.codes for d in days if d)
+    return max((len(m) for m in _OFF_RUN.findall(codes)), default=0) * 0.5
+
+
+def as_state_list(value: Any) -> list[str]:
+    """Convert a DaySchedule (or legacy list/None) to a list of state names."""
+    if isinstance(value, DaySchedule):
+        return value.to_list()
+    return list(value or [])
+
+
+def as_state_lists(values: Optional[list[Any]]) -> list[list[str]]:
+    return [as_state_list(v) for v in values or []]
+
+
+def export_payload(data: Optional[dict[str, Any]]) -> dict[str, Any]:
+    """Coordinator payload with schedules converted to JSON-friendly lists."""
+    out: dict[str, Any] = {}
+    for key, value in (data or {}).items():
+        if isinstance(value, DaySchedule):
+            out[key] = value.to_list()
+        elif isinstance(value, ScheduleIndex):
+            out[key] = [
+                {"start": seg.start.isoformat(), "end": seg.end.isoformat(), "state": STATE_NAMES[seg.state]}
+                for seg in value.segments
+            ]
+        elif key.startswith("history_") and isinstance(value, list):
+            out[key] = as_state_lists(value)
+        else:
+            out[key] = value
+    return out
+
+
+class Segment(NamedTuple):
+    """One run of equal state with absolute UTC bounds (end is exclusive)."""
+
+    start: datetime
+    end: datetime
+    state: int
+
+
+class ScheduleIndex:
+    """Sorted state transitions of consecutive days for bisect lookups.
+
+    Будується один раз на payload; сусідні дні зшиваються, якщо вони
+    йдуть підряд (інтервал через північ стає одним сегментом).
+    """
+
+    __slots__ = ("_segments", "_starts", "_by_state", "_starts_by_state", "_ends_by_state")
+
+    def __init__(self, segments: tuple[Segment, ...] = ()) -> None:
+        self._segments = segments
+        self._starts = [seg.start for seg in segments]
+        self._by_state: dict[int, list[Segment]] = {}
+        for seg in segments:
+            self._by_state.setdefault(seg.state, []).append(seg)
+        self._starts_by_state = {k: [s.start for s in v] for k, v in self._by_state.items()}
+        self._ends_by_state = {k: [s.end for s in v] for k, v in self._by_state.items()}
+
+    @classmethod
+    def build(cls, days: list[tuple[date, DaySchedule]], tz: tzinfo) -> ScheduleIndex:
+        """Build from `(local date, DaySchedule)` pairs in chronological order."""
+        segments: list[Segment] = []
+        for day, sched in days:
+            codes = sched.codes
+            if not codes:
+                continue
+            midnight = datetime.combine(day, time.min, tzinfo=tz)
+            run_start = 0
+            for i in range(1, len(codes) + 1):
+                if i < len(codes) and codes[i] == codes[run_start]:
+                    continue
+                start = slot_start_utc(midnight, run_start)
+                end = slot_start_utc(midnight, i)
+                state = codes[run_start]
+                if end <= start:
+                    # Мітки неіснуючої години (перехід на літній час)
+                    run_start = i
+                    continue
+                prev = segments[-1] if segments else None
+                if prev and prev.end == start and prev.state == state:
+                    segments[-1] = Segment(prev.start, end, state)
+                else:
+                    segments.append(Segment(start, end, state))
+                run_start = i
+        return cls(tuple(segments))
+
+    @property
+    def segments(self) -> tuple[Segment, ...]:
+        return self._segments
+
+    def segment_at(self, at: datetime) -> Optional[Segment]:
+        """Segment covering `at` (any state), or None outside the schedule."""
+        i = bisect_right(self._starts, at) - 1
+        if i >= 0 and at < self._segments[i].end:
+            return self._segments[i]
+        return None
+
+    def state_at(self, at: datetime) -> str:
+        seg = self.segment_at(at)
+        return STATE_NAMES[seg.state] if seg else "unknown"
+
+    def interval_at(self, state: int, at: datetime) -> Optional[Segment]:
+        """Segment with `state` covering `at` (current interval)."""
+        seg = self.segment_at(at)
+        return seg if seg and seg.state == state else None
+
+    def next_interval(self, state: int, after: datetime) -> Optional[Segment]:
+        """First segment with `state` that starts strictly after `after`."""
+        starts = self._starts_by_state.get(state)
+        if not starts:
+            return None
+        i = bisect_right(starts, after)
+        return self._by_state[state][i] if i < len(starts) else None
+
+    def next_at(self, state: int, at: datetime) -> Optional[datetime]:
+        """Earliest moment >= `at` at which `state` holds."""
+        if self.interval_at(state, at):
+            return at
+        seg = self.next_interval(state, at)
+        return seg.start if seg else None
+
+    def next_change(self, after: datetime) -> Optional[datetime]:
+        """First transition (start of any segment) strictly after `after`."""
+        i = bisect_right(self._starts, after)
+        if i < len(self._starts):
+            return self._starts[i]
+        # Кінець останнього сегмента теж є зміною (далі графіка немає)
+        if self._segments and after < self._segments[-1].end:
+            return self._segments[-1].end
+        return None
+
+    def intervals(self, state: int, start: datetime, end: datetime) -> list[Segment]:
+        """Segments with `state` overlapping [start, end)."""
+        lo, hi = self.interval_bounds(state, start, end)
+        return self._by_state[state][lo:hi] if hi > lo else []
+
+    def intervals_of(self, state: int) -> list[Segment]:
+        """All segments with `state`, in chronological order."""
+        return list(self._by_state.get(state, ()))
+
+    def interval_bounds(self, state: int, start: datetime, end: datetime) -> tuple[int, int]:
+        """Positions [lo, hi) in intervals_of(state) of the segments overlapping [start, end).
+
+        lo — перший сегмент, що закінчується після `start` (поточний або наступний).
+        """
+        if state not in self._by_state:
+            return 0, 0
+        lo = bisect_right(self._ends_by_state[state], start)
+        hi = bisect_left(self._starts_by_state[state], end)
+        return lo, max(lo, hi)
+
+    def __bool__(self) -> bool:
+        return bool(self._segments)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ScheduleIndex):
+            return self._segments == other._segments
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._segments)
+
+    def __repr__(self) -> str:
+        return f"ScheduleIndex(segments={len(self._segments)})"
+
+
+EMPTY_INDEX = ScheduleIndex()
+
+
+def slot_start_utc(local_midnight: datetime, idx: int) -> datetime:
+    """UTC start of the slot labelled `idx` ("HH:MM" = idx * 30 хв настінного часу).
+
+    API нумерує слоти за місцевим годинником, тож кожна мітка переводиться як
+    місцевий час. У день переходу на літній час мітки неіснуючої години
+    зсуваються на момент переходу (слоти нульової довжини), а в день переходу
+    на зимовий повторювана година береться першою (fold=0) — порядок слотів
+    зберігається. idx >= 48 — це наступна місцева північ.
+    """
+    tz = local_midnight.tzinfo
+    day = local_midnight.date()
+    while idx < SLOTS_PER_DAY:
+        wall = time(idx // 2, 30 * (idx % 2))
+        at = datetime.combine(day, wall, tzinfo=tz).astimezone(timezone.utc)
+        # Неіснуючий місцевий час не переживає перетворення туди-назад
+        if at.astimezone(tz).time() == wall:
+            return at
+        idx += 1
+    return datetime.combine(day + timedelta(days=1), time.min, tzinfo=tz).astimezone(timezone.utc)
+
+
+def schedule_arrays(data: Optional[dict[str, Any]]) -> dict[str, Any]:
+    """Bulky schedule arrays of a coordinator payload, served on demand to the card."""
+    data = data or {}
+    return {
+        "schedule_version": data.get("schedule_version"),
+        "date": data.get("date"),
+        "tomorrow_date": data.get("tomorrow_date"),
+        "today_48half": as_state_list(data.get("today_48half")),
+        "tomorrow_48half": as_state_list(data.get("tomorrow_48half")),
+        "history_today_48half": as_state_lists(data.get("history_today_48half")),
+        "history_tomorrow_48half": as_state_lists(data.get("history_tomorrow_48half")),
+    }
+
+
+class ParsedSchedule(NamedTuple):
+    """Immutable derived schedule of one region/queue (shared between coordinators)."""
+
+    has_schedule: bool
+    today: DaySchedule
+    tomorrow: DaySchedule
+    index: ScheduleIndex
+    today_outage_hours: Optional[float]
+    tomorrow_outage_hours: Optional[float]
+    longest_outage_hours: Optional[float]
+
+
+NO_SCHEDULE = ParsedSchedule(False, EMPTY_DAY, EMPTY_DAY, EMPTY_INDEX, None, None, None)
+
+
+def parse_schedule(
+    base_day: date,
+    tomorrow_day: Optional[date],
+    slots_today_map: dict[str, Any],
+    slots_tomorrow_map: dict[str, Any],
+    tz: tzinfo,
+) -> ParsedSchedule:
+    """Parse API slot maps of today/tomorrow into DaySchedules, index and statistics."""
+    if not any(v in (STATE_ON, STATE_OFF) for v in slots_today_map.values()):
+        return NO_SCHEDULE
+
+    today = DaySchedule.from_slots_map(slots_today_map)
+    tomorrow = DaySchedule.from_slots_map(slots_tomorrow_map) if slots_tomorrow_map else EMPTY_DAY
+    # If all slots are "unknown", there's no real schedule → treat as empty
+    if tomorrow and tomorrow.is_unknown:
+        tomorrow = EMPTY_DAY
+
+    # Індекс переходів (абсолютний UTC) — будується один раз на payload,
+    # далі "next on/off", поточний інтервал і т.д. — це bisect-пошук.
+    days = [(base_day, today)]
+    if tomorrow_day and tomorrow:
+        days.append((tomorrow_day, tomorrow))
+
+    return ParsedSchedule(
+        has_schedule=True,
+        today=today,
+        tomorrow=tomorrow,
+        index=ScheduleIndex.build(days, tz),
+        today_outage_hours=today.outage_hours,
+        tomorrow_outage_hours=tomorrow.outage_hours if tomorrow else None,
+        # Longest outage can span across today and tomorrow if available
+        longest_outage_hours=longest_off_hours(today, tomorrow),
+    )
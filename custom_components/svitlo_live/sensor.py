@@ -1,42 +1,62 @@
 from __future__ import annotations
+import math
 from typing import Any, Optional
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTime
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .const import CONF_QUEUE, DOMAIN, QUEUE_ALL, UNRECORDED_ATTRIBUTES
+from .countdown import CountdownScheduler
+from .region_stats import STATS_BACKEND, DayStats
+
+TZ_KYIV = dt_util.get_time_zone("Europe/Kyiv")
 
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
-    coordinator = hass.data[DOMAIN][entry.entry_id]
-    entities: list[SensorEntity] = [
-        SvitloStatusSensor(coordinator),
-        SvitloNextGridConnectionSensor(coordinator),
-        SvitloNextOutageSensor(coordinator),
-        SvitloMinutesToGridConnection(coordinator),
-        SvitloMinutesToOutage(coordinator),
-        # Нові класи з новими ID згідно з PR
-        SvitloNextPowerOn(coordinator),
-        SvitloNextPowerOff(coordinator),
-        SvitloScheduleUpdatedSensor(coordinator),
-        SvitloOutageHoursToday(coordinator),
-        SvitloOutageHoursTomorrow(coordinator),
-        SvitloLongestOutage(coordinator),
-    ]
+    root = hass.data[DOMAIN][entry.entry_id]
+    entities: list[SensorEntity] = []
+    # Набір сенсорів на кожну чергу (у записі "всі черги" — на кожну чергу регіону)
+    for coordinator in root.queue_coordinators():
+        entities += [
+            SvitloStatusSensor(coordinator),
+            SvitloNextGridConnectionSensor(coordinator),
+            SvitloNextOutageSensor(coordinator),
+            SvitloMinutesToGridConnection(coordinator),
+            SvitloMinutesToOutage(coordinator),
+            # Нові класи з новими ID згідно з PR
+            SvitloNextPowerOn(coordinator),
+            SvitloNextPowerOff(coordinator),
+            SvitloScheduleUpdatedSensor(coordinator),
+            SvitloOutageHoursToday(coordinator),
+            SvitloOutageHoursTomorrow(coordinator),
+            SvitloLongestOutage(coordinator),
+        ]
+    # Діагностика трафіку до API (вимкнені за замовчуванням) — одна на запис
+    first = root.queue_coordinators()[:1]
+    for coordinator in first:
+        entities += [SvitloApiTraffic(coordinator), SvitloApiResponseTime(coordinator)]
+    # Агрегати по всіх чергах — на окремому девайсі регіону
+    if entry.data.get(CONF_QUEUE) == QUEUE_ALL:
+        entities += [
+            SvitloRegionOffNow(root),
+            SvitloRegionOutageToday(root),
+            SvitloRegionOutageTomorrow(root),
+            SvitloRegionWorstQueue(root),
+        ]
     async_add_entities(entities)
 
 
 class SvitloBaseEntity(CoordinatorEntity, SensorEntity):
     _attr_has_entity_name = True
+    _unrecorded_attributes = UNRECORDED_ATTRIBUTES
 
     def __init__(self, coordinator) -> None:
         super().__init__(coordinator)
@@ -91,14 +111,13 @@ class SvitloStatusSensor(SvitloBaseEntity):
             "region": getattr(self.coordinator, "region", ""),
             "queue": getattr(self.coordinator, "queue", ""),
             "now_status": data.get("now_status"),
-            "today_48half": data.get("today_48half", []),
-            "tomorrow_48half": data.get("tomorrow_48half", []),
             "next_change_at": data.get("next_change_at"),
             "today_outage_hours": data.get("today_outage_hours"),
             "tomorrow_outage_hours": data.get("tomorrow_outage_hours"),
             "longest_outage_hours": data.get("longest_outage_hours"),
-            "history_today_48half": data.get("history_today_48half", []),
-            "history_tomorrow_48half": data.get("history_tomorrow_48half", []),
+            # Масиви графіка віддаються на запит через websocket "svitlo_live/schedule";
+            # в атрибутах лише версія, за якою картка розуміє, що треба перечитати.
+            "schedule_version": data.get("schedule_version"),
             "updated": data.get("updated"),
         }
 
@@ -145,157 +164,155 @@ class SvitloNextOutageSensor(SvitloBaseEntity):
         return dt_util.parse_datetime(iso_val) if iso_val else None
 
 
-# ---------- DURATION сенсори (Нова логіка з PR) ----------
+# ---------- Спільна логіка зворотного відліку ----------
 
-class SecondsRemainEntity(SvitloBaseEntity):
-    _attr_device_class = SensorDeviceClass.DURATION
-    _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
-    _attr_suggested_unit_of_measurement = UnitOfTime.HOURS
-    _attr_suggested_display_precision = 2
+class _CountdownBase(SvitloBaseEntity):
+    """Countdown to `_target_key` while the status is `_required_status`.
+
+    Значення квантується до кроку `_step_seconds` (те, що реально видно в UI),
+    а тики приходять від одного спільного CountdownScheduler хаба рівно на межі
+    наступного кроку. Стан пишеться лише коли значення змінилось.
+    """
 
-    _unsub_timer = None
+    _target_key: str = ""
+    _required_status: str = ""
+    _step_seconds: int = 60
+    _unit_seconds: int = 1
+    _last_value: Optional[int] = None
 
     async def async_added_to_hass(self) -> None:
         await super().async_added_to_hass()
-        @callback
-        def _tick(now) -> None:
-            self.async_write_ha_state()
-
-        self._unsub_timer = async_track_time_interval(
-            self.hass, _tick, timedelta(seconds=10)
-        )
+        self._last_value = self.native_value
+        self._async_reschedule()
 
     async def async_will_remove_from_hass(self) -> None:
         await super().async_will_remove_from_hass()
-        if self._unsub_timer:
-            self._unsub_timer()
-            self._unsub_timer = None
+        self._scheduler.async_cancel(self._async_tick)
 
-    def _seconds_until(self, iso_utc: Optional[str]) -> Optional[int]:
-        if not iso_utc:
+    @property
+    def _scheduler(self) -> CountdownScheduler:
+        return self.coordinator.hub.countdown
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._last_value = self.native_value
+        super()._handle_coordinator_update()
+        self._async_reschedule()
+
+    @callback
+    def _async_reschedule(self) -> None:
+        self._scheduler.async_schedule(self._async_tick, self._next_boundary(dt_util.utcnow()))
+
+    @callback
+    def _async_tick(self, now) -> Optional[datetime]:
+        value = self.native_value
+        if value != self._last_value:
+            self._last_value = value
+            self.async_write_ha_state()
+        return self._next_boundary(now)
+
+    def _target(self) -> Optional[datetime]:
+        d = getattr(self.coordinator, "data", None)
+        if not d or not getattr(self.coordinator, "last_update_success", False):
             return None
-        target = dt_util.parse_datetime(iso_utc)
-        if not target:
+        if d.get("now_status") != self._required_status:
             return None
-        now_utc = dt_util.utcnow()
-        delta_s = (target - now_utc).total_seconds()
+        iso_utc = d.get(self._target_key)
+        return dt_util.parse_datetime(iso_utc) if iso_utc else None
+
+    def _remaining_steps(self, target: datetime, now: datetime) -> int:
+        delta_s = (target - now).total_seconds()
         if delta_s <= 0:
             return 0
-        seconds = int(delta_s + 0.5)
-        return seconds
+        return math.ceil(delta_s / self._step_seconds)
+
+    def _next_boundary(self, now: datetime) -> Optional[datetime]:
+        """Moment when the quantized value drops to the next step."""
+        target = self._target()
+        if target is None:
+            return None
+        steps = self._remaining_steps(target, now)
+        if steps <= 0:
+            return None
+        return target - timedelta(seconds=(steps - 1) * self._step_seconds)
+
+    @property
+    def native_value(self) -> Optional[int]:
+        target = self._target()
+        if target is None:
+            return None
+        steps = self._remaining_steps(target, dt_util.utcnow())
+        return steps * self._step_seconds // self._unit_seconds
+
+
+# ---------- DURATION сенсори (Нова логіка з PR) ----------
+
+class SecondsRemainEntity(_CountdownBase):
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_suggested_unit_of_measurement = UnitOfTime.HOURS
+    _attr_suggested_display_precision = 2
+
+    # 0.01 год (точність відображення) = 36 с
+    _step_seconds = 36
 
 
 # Тут нові класи і нові unique_id, як хотів автор PR
 class SvitloNextPowerOn(SecondsRemainEntity):
     _attr_translation_key = "svitlo_next_power_on"
     _attr_icon = "mdi:lightbulb-on"
+    _target_key = "next_on_at"
+    _required_status = "off"
 
     def __init__(self, coordinator) -> None:
         super().__init__(coordinator)
         # Новий ID
         self._attr_unique_id = f"svitlo_next_power_on_{coordinator.region}_{coordinator.queue}"
 
-    @property
-    def native_value(self) -> Optional[int]:
-        d = getattr(self.coordinator, "data", None)
-        if not d or not getattr(self.coordinator, "last_update_success", False):
-            return None
-        if d.get("now_status") != "off":
-            return None
-        return self._seconds_until(d.get("next_on_at"))
-
 
 class SvitloNextPowerOff(SecondsRemainEntity):
     _attr_translation_key = "svitlo_next_power_off"
     _attr_icon = "mdi:lightbulb-off"
+    _target_key = "next_off_at"
+    _required_status = "on"
 
     def __init__(self, coordinator) -> None:
         super().__init__(coordinator)
         # Новий ID
         self._attr_unique_id = f"svitlo_next_power_off_{coordinator.region}_{coordinator.queue}"
 
-    @property
-    def native_value(self) -> Optional[int]:
-        d = getattr(self.coordinator, "data", None)
-        if not d or not getattr(self.coordinator, "last_update_success", False):
-            return None
-        if d.get("now_status") != "on":
-            return None
-        return self._seconds_until(d.get("next_off_at"))
-
 
 # ---------- Числові сенсори (хвилини - старі) ----------
 
-class _MinutesBase(SvitloBaseEntity):
+class _MinutesBase(_CountdownBase):
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_unit_of_measurement = "min"
-    _unsub_timer = None
-
-    async def async_added_to_hass(self) -> None:
-        await super().async_added_to_hass()
-        @callback
-        def _tick(now) -> None:
-            self.async_write_ha_state()
-        self._unsub_timer = async_track_time_interval(
-            self.hass, _tick, timedelta(seconds=30)
-        )
-
-    async def async_will_remove_from_hass(self) -> None:
-        await super().async_will_remove_from_hass()
-        if self._unsub_timer:
-            self._unsub_timer()
-            self._unsub_timer = None
-
-    def _minutes_until(self, iso_utc: Optional[str]) -> Optional[int]:
-        if not iso_utc:
-            return None
-        target = dt_util.parse_datetime(iso_utc)
-        if not target:
-            return None
-        now_utc = dt_util.utcnow()
-        delta_s = (target - now_utc).total_seconds()
-        if delta_s <= 0:
-            return 0
-        mins = int((delta_s + 59) // 60)
-        return mins
+    _step_seconds = 60
+    _unit_seconds = 60
 
 
 class SvitloMinutesToGridConnection(_MinutesBase):
     _attr_translation_key = "svitlo_min_to_on"
     _attr_icon = "mdi:timer-sand"
+    _target_key = "next_on_at"
+    _required_status = "off"
 
     def __init__(self, coordinator) -> None:
         super().__init__(coordinator)
         self._attr_unique_id = f"svitlo_min_to_on_{coordinator.region}_{coordinator.queue}"
 
-    @property
-    def native_value(self) -> Optional[int]:
-        d = getattr(self.coordinator, "data", None)
-        if not d or not getattr(self.coordinator, "last_update_success", False):
-            return None
-        if d.get("now_status") != "off":
-            return None
-        return self._minutes_until(d.get("next_on_at"))
-
 
 class SvitloMinutesToOutage(_MinutesBase):
     _attr_translation_key = "svitlo_min_to_off"
     _attr_icon = "mdi:timer-sand"
+    _target_key = "next_off_at"
+    _required_status = "on"
 
     def __init__(self, coordinator) -> None:
         super().__init__(coordinator)
         self._attr_unique_id = f"svitlo_min_to_off_{coordinator.region}_{coordinator.queue}"
 
-    @property
-    def native_value(self) -> Optional[int]:
-        d = getattr(self.coordinator, "data", None)
-        if not d or not getattr(self.coordinator, "last_update_success", False):
-            return None
-        if d.get("now_status") != "on":
-            return None
-        return self._minutes_until(d.get("next_off_at"))
-
 
 class SvitloScheduleUpdatedSensor(SvitloBaseEntity):
     _attr_translation_key = "svitlo_updated"
@@ -372,3 +389,188 @@ class SvitloLongestOutage(SvitloBaseEntity):
         if not d or not getattr(self.coordinator, "last_update_success", False):
             return None
         return d.get("longest_outage_hours")
+
+
+# ---------- ДІАГНОСТИКА ТРАФІКУ ----------
+
+class _ApiTransferBase(SvitloBaseEntity):
+    """Download stats of the API endpoint this entry uses (shared by all its entries)."""
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self.coordinator.hub.async_listen_transfer(self.async_write_ha_state))
+
+    @property
+    def _stats(self):
+        return self.coordinator.hub.transfer_stats(self.coordinator.is_new_api)
+
+
+class SvitloApiTraffic(_ApiTransferBase):
+    _attr_translation_key = "svitlo_api_traffic"
+    _attr_icon = "mdi:download-network"
+    _attr_device_class = SensorDeviceClass.DATA_SIZE
+    _attr_native_unit_of_measurement = UnitOfInformation.BYTES
+    _attr_suggested_unit_of_measurement = UnitOfInformation.KIBIBYTES
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _unrecorded_attributes = UNRECORDED_ATTRIBUTES | {
+        "responses_200",
+        "responses_304",
+        "errors",
+        "raw_bytes_200",
+        "raw_unknown_200",
+        "decoded_bytes_200",
+        "header_bytes_200",
+        "header_bytes_304",
+        "compression_ratio",
+    }
+
+    def __init__(self, coordinator) -> None:
+        super().__init__(coordinator)
+        self._attr_unique_id = f"svitlo_api_traffic_{coordinator.region}_{coordinator.queue}"
+
+    @property
+    def native_value(self) -> int:
+        return self._stats.total_bytes
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        stats = self._stats.as_dict()
+        stats.pop("total_bytes", None)
+        stats.pop("avg_response_ms", None)
+        return stats
+
+
+class SvitloApiResponseTime(_ApiTransferBase):
+    _attr_translation_key = "svitlo_api_response_time"
+    _attr_icon = "mdi:timer-sand"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_suggested_display_precision = 0
+
+    def __init__(self, coordinator) -> None:
+        super().__init__(coordinator)
+        self._attr_unique_id = f"svitlo_api_response_time_{coordinator.region}_{coordinator.queue}"
+
+    @property
+    def native_value(self) -> Optional[float]:
+        return self._stats.avg_response_ms
+
+
+# ---------- РЕГІОН (запис "всі черги") ----------
+
+class _RegionStatsBase(SvitloBaseEntity):
+    """Aggregates over every queue of the region (see region_stats.py)."""
+
+    def __init__(self, coordinator, key: str) -> None:
+        super().__init__(coordinator)
+        self._attr_unique_id = f"svitlo_{key}_{coordinator.region}_{QUEUE_ALL}"
+
+    def _day(self, tomorrow: bool = False) -> Optional[DayStats]:
+        stats = getattr(self.coordinator, "region_stats", None)
+        if stats is None or not getattr(self.coordinator, "last_update_success", False):
+            return None
+        day = stats.tomorrow if tomorrow else stats.today
+        return day if day is not None and day.queues_with_schedule else None
+
+    @property
+    def device_info(self) -> dict[str, Any]:
+        region = getattr(self.coordinator, "region", "region")
+        return {
+            "identifiers": {(DOMAIN, f"{region}_{QUEUE_ALL}")},
+            "manufacturer": "Serhii Chaichuk",
+            "model": "Region (all queues)",
+            "name": f"Svitlo • {region}",
+            "configuration_url": "https://github.com/chaichuk",
+        }
+
+
+class SvitloRegionOffNow(_RegionStatsBase):
+    _attr_translation_key = "svitlo_region_off_now"
+    _attr_icon = "mdi:home-lightning-bolt-outline"
+    _attr_native_unit_of_measurement = "%"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_suggested_display_precision = 0
+    _unrecorded_attributes = UNRECORDED_ATTRIBUTES | {"off_percent_today", "off_percent_tomorrow", "backend"}
+
+    def __init__(self, coordinator) -> None:
+        super().__init__(coordinator, "region_off_now")
+
+    @property
+    def native_value(self) -> Optional[float]:
+        day = self._day()
+        if day is None:
+            return None
+        # Частка змінюється лише на переходах черг — тоді ж оновлюється координатор
+        now = dt_util.now(TZ_KYIV)
+        return day.off_percent[now.hour * 2 + now.minute // 30]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        today, tomorrow = self._day(), self._day(tomorrow=True)
+        stats = getattr(self.coordinator, "region_stats", None)
+        return {
+            "region": getattr(self.coordinator, "region", ""),
+            "queues": stats.queues if stats else 0,
+            "queues_with_schedule": today.queues_with_schedule if today else 0,
+            # % черг без світла по півгодинних слотах (00:00, 00:30, ...)
+            "off_percent_today": list(today.off_percent) if today else [],
+            "off_percent_tomorrow": list(tomorrow.off_percent) if tomorrow else [],
+            "backend": STATS_BACKEND,
+        }
+
+
+class SvitloRegionOutageToday(_RegionStatsBase):
+    _attr_translation_key = "svitlo_region_outage_today"
+    _attr_icon = "mdi:clock-alert-outline"
+    _attr_native_unit_of_measurement = UnitOfTime.HOURS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_suggested_display_precision = 1
+
+    def __init__(self, coordinator) -> None:
+        super().__init__(coordinator, "region_outage_today")
+
+    @property
+    def native_value(self) -> Optional[float]:
+        day = self._day()
+        return day.total_outage_hours if day else None
+
+
+class SvitloRegionOutageTomorrow(_RegionStatsBase):
+    _attr_translation_key = "svitlo_region_outage_tomorrow"
+    _attr_icon = "mdi:calendar-clock"
+    _attr_native_unit_of_measurement = UnitOfTime.HOURS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_suggested_display_precision = 1
+
+    def __init__(self, coordinator) -> None:
+        super().__init__(coordinator, "region_outage_tomorrow")
+
+    @property
+    def native_value(self) -> Optional[float]:
+        day = self._day(tomorrow=True)
+        return day.total_outage_hours if day else None
+
+
+class SvitloRegionWorstQueue(_RegionStatsBase):
+    _attr_translation_key = "svitlo_region_worst_queue"
+    _attr_icon = "mdi:podium"
+
+    def __init__(self, coordinator) -> None:
+        super().__init__(coordinator, "region_worst_queue")
+
+    @property
+    def native_value(self) -> Optional[str]:
+        day = self._day()
+        return day.worst_queue if day else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        today, tomorrow = self._day(), self._day(tomorrow=True)
+        return {
+            "outage_hours_today": today.worst_queue_hours if today else None,
+            "worst_queue_tomorrow": tomorrow.worst_queue if tomorrow else None,
+            "outage_hours_tomorrow": tomorrow.worst_queue_hours if tomorrow else None,
+        }
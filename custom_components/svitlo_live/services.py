@@ -0,0 +1,71 @@
+"""Services of the Svitlo Live integration."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, CONF_REGION, CONF_QUEUE, QUEUE_ALL
+
+SERVICE_GET_SCHEDULE_REVISIONS = "get_schedule_revisions"
+
+TZ_KYIV = dt_util.get_time_zone("Europe/Kyiv")
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_START_DATE = "start_date"
+ATTR_END_DATE = "end_date"
+
+GET_SCHEDULE_REVISIONS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_START_DATE): cv.date,
+        vol.Optional(ATTR_END_DATE): cv.date,
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register integration services."""
+
+    async def _async_get_schedule_revisions(call: ServiceCall) -> ServiceResponse:
+        entry = hass.config_entries.async_get_entry(call.data[ATTR_CONFIG_ENTRY_ID])
+        hub = hass.data.get(DOMAIN, {}).get("hub")
+        if entry is None or entry.domain != DOMAIN or hub is None:
+            raise ServiceValidationError(
+                f"Svitlo entry {call.data[ATTR_CONFIG_ENTRY_ID]} is not loaded"
+            )
+
+        today = dt_util.now(TZ_KYIV).date()
+        end = call.data.get(ATTR_END_DATE, today + timedelta(days=1))
+        start = call.data.get(ATTR_START_DATE, end - timedelta(days=7))
+        region = entry.data[CONF_REGION]
+        queue = entry.data[CONF_QUEUE]
+
+        if queue == QUEUE_ALL:
+            coordinator = hass.data[DOMAIN].get(entry.entry_id)
+            queues = [c.queue for c in coordinator.queue_coordinators()] if coordinator else []
+            return {
+                "region": region,
+                "queue": queue,
+                "queues": {q: hub.history.revisions(f"{region}|{q}", start, end) for q in queues},
+            }
+
+        return {
+            "region": region,
+            "queue": queue,
+            "days": hub.history.revisions(f"{region}|{queue}", start, end),
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_SCHEDULE_REVISIONS,
+        _async_get_schedule_revisions,
+        schema=GET_SCHEDULE_REVISIONS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
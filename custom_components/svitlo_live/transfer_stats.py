@@ -0,0 +1,100 @@
+"""Per-endpoint download accounting: bytes on the wire vs decoded, 200 vs 304."""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Iterable, Optional
+
+# Скільки останніх відповідей усереднюємо для часу відповіді
+RESPONSE_TIME_WINDOW = 20
+
+
+def accept_encoding() -> str:
+    """Accept-Encoding value for the codecs aiohttp can decode in this environment."""
+    encodings = ["gzip", "deflate"]
+    try:
+        from aiohttp import compression_utils
+    except ImportError:  # pragma: no cover - very old aiohttp
+        return ", ".join(encodings)
+    if getattr(compression_utils, "HAS_BROTLI", False):
+        encodings.append("br")
+    if getattr(compression_utils, "HAS_ZSTD", False):
+        encodings.append("zstd")
+    return ", ".join(encodings)
+
+
+def header_bytes(raw_headers: Iterable[tuple[bytes, bytes]]) -> int:
+    """Approximate size of a response header block ("Name: value\\r\\n" per line)."""
+    return sum(len(name) + len(value) + 4 for name, value in raw_headers)
+
+
+class TransferStats:
+    """Counters of one endpoint since Home Assistant start."""
+
+    def __init__(self) -> None:
+        self.responses_200 = 0
+        self.responses_304 = 0
+        self.errors = 0
+        # Тіло відповіді 200: як прийшло мережею (стиснене) і після розпакування
+        self.raw_bytes_200 = 0
+        self.decoded_bytes_200 = 0
+        # Стиснені відповіді без Content-Length: розмір з мережі невідомий,
+        # тож вони не входять ні в raw_bytes_200, ні в compression_ratio
+        self.raw_unknown_200 = 0
+        self._ratio_decoded_bytes = 0
+        # Заголовки рахуються окремо: для 304 це весь трафік
+        self.header_bytes_200 = 0
+        self.header_bytes_304 = 0
+        self.last_encoding: Optional[str] = None
+        self._response_ms: deque[float] = deque(maxlen=RESPONSE_TIME_WINDOW)
+
+    @property
+    def total_bytes(self) -> int:
+        """Everything downloaded from this endpoint (bodies as transferred + headers)."""
+        return self.raw_bytes_200 + self.header_bytes_200 + self.header_bytes_304
+
+    @property
+    def avg_response_ms(self) -> Optional[float]:
+        if not self._response_ms:
+            return None
+        return round(sum(self._response_ms) / len(self._response_ms), 1)
+
+    def record_200(
+        self, raw_bytes: Optional[int], decoded_bytes: int, headers: int, encoding: Optional[str], ms: float
+    ) -> None:
+        """Count one 200 response; `raw_bytes` is None when the wire size is unknown."""
+        self.responses_200 += 1
+        self.decoded_bytes_200 += decoded_bytes
+        if raw_bytes is None:
+            self.raw_unknown_200 += 1
+        else:
+            self.raw_bytes_200 += raw_bytes
+            self._ratio_decoded_bytes += decoded_bytes
+        self.header_bytes_200 += headers
+        self.last_encoding = encoding or "identity"
+        self._response_ms.append(ms)
+
+    def record_304(self, headers: int, ms: float) -> None:
+        self.responses_304 += 1
+        self.header_bytes_304 += headers
+        self._response_ms.append(ms)
+
+    def record_error(self) -> None:
+        self.errors += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "responses_200": self.responses_200,
+            "responses_304": self.responses_304,
+            "errors": self.errors,
+            "raw_bytes_200": self.raw_bytes_200,
+            "raw_unknown_200": self.raw_unknown_200,
+            "decoded_bytes_200": self.decoded_bytes_200,
+            "header_bytes_200": self.header_bytes_200,
+            "header_bytes_304": self.header_bytes_304,
+            "total_bytes": self.total_bytes,
+            "compression_ratio": (
+                round(self._ratio_decoded_bytes / self.raw_bytes_200, 2) if self.raw_bytes_200 else None
+            ),
+            "last_encoding": self.last_encoding,
+            "avg_response_ms": self.avg_response_ms,
+        }
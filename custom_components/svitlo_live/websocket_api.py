@@ -0,0 +1,48 @@
+"""Websocket API: schedule arrays served on demand to the Lovelace card."""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+
+from .const import DOMAIN
+from .schedule import schedule_arrays
+
+
+@callback
+def async_setup(hass: HomeAssistant) -> None:
+    """Register websocket commands."""
+    websocket_api.async_register_command(hass, ws_get_schedule)
+
+
+def _coordinator_for_entity(hass: HomeAssistant, entity_id: str) -> Optional[Any]:
+    entry = er.async_get(hass).async_get(entity_id)
+    if entry is None or entry.platform != DOMAIN or not entry.config_entry_id:
+        return None
+    coordinator = hass.data.get(DOMAIN, {}).get(entry.config_entry_id)
+    # У записі "всі черги" сутність належить координатору своєї черги
+    return coordinator.coordinator_for_unique_id(entry.unique_id) if coordinator else None
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "svitlo_live/schedule",
+        vol.Required("entity_id"): str,
+    }
+)
+@callback
+def ws_get_schedule(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return today/tomorrow/history half-hour arrays for a svitlo entity."""
+    coordinator = _coordinator_for_entity(hass, msg["entity_id"])
+    if coordinator is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, f"No Svitlo entry for {msg['entity_id']}"
+        )
+        return
+    connection.send_result(msg["id"], schedule_arrays(coordinator.data))
@@ -582,9 +582,34 @@ class SvitloLiveCard extends HTMLElement {
     if (this.config && this.config.show_actual_history) {
       this._fetchHistoryFromEntity(hass);
     }
+    this._fetchSchedule(hass);
     this._renderWithCurrentDay(hass);
   }
 
+  // Масиви графіка не зберігаються в атрибутах: тягнемо їх через websocket,
+  // лише коли змінилась attributes.schedule_version.
+  async _fetchSchedule(hass) {
+    const entityId = this.config && this.config.entity;
+    const stateObj = entityId && hass.states[entityId];
+    if (!stateObj) return;
+
+    const version = stateObj.attributes.schedule_version;
+    if (!version) return;
+    const key = `${entityId}|${version}`;
+    if (this._scheduleKey === key || this._scheduleFetching === key) return;
+
+    this._scheduleFetching = key;
+    try {
+      this._schedule = await hass.callWS({ type: "svitlo_live/schedule", entity_id: entityId });
+      this._scheduleKey = key;
+      this._renderWithCurrentDay(this._hass);
+    } catch (e) {
+      console.warn("SvitloLive: Error fetching schedule", e);
+    } finally {
+      if (this._scheduleFetching === key) this._scheduleFetching = null;
+    }
+  }
+
   async _fetchHistoryFromEntity(hass) {
     if (!this.config || !this.config.show_actual_history) return;
 
@@ -726,7 +751,10 @@ class SvitloLiveCard extends HTMLElement {
     }
 
     const stateObj = hass.states[config.entity];
-    const attrs = stateObj.attributes;
+    // Старі версії інтеграції віддавали масиви прямо в атрибутах
+    const attrs = (!stateObj.attributes.today_48half && this._schedule && this._scheduleKey && this._scheduleKey.startsWith(`${config.entity}|`))
+      ? { ...stateObj.attributes, ...this._schedule }
+      : stateObj.attributes;
 
     const showStats = config.show_stats !== false;
     const showActualHistory = config.show_actual_history === true;
@@ -1702,7 +1730,8 @@ class SvitloLiveCard extends HTMLElement {
   }
 
   static getStubConfig(hass, entities, entityIds) {
-    const e = entityIds.find(id => hass.states[id]?.attributes?.today_48half);
+    const e = entityIds.find(id => id.startsWith("calendar.") && hass.states[id]?.attributes?.schedule_version)
+      || entityIds.find(id => hass.states[id]?.attributes?.today_48half);
     return { entity: e || '', title: '' };
   }
 }
@@ -0,0 +1 @@
+"""Tests for the Svitlo Live integration."""
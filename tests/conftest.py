@@ -0,0 +1,8 @@
+"""Common fixtures (pytest-homeassistant-custom-component provides `hass`)."""
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load custom_components/ in every test."""
+    yield
@@ -0,0 +1,87 @@
+"""SvitloApiHub: single-flight fetches per endpoint URL."""
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from custom_components.svitlo_live.api_hub import SvitloApiHub  # noqa: E402
+from custom_components.svitlo_live.const import DTEK_API_URL, OLD_API_URL  # noqa: E402
+
+OLD_PAYLOAD = {"date_today": "2026-02-04", "regions": [{"cpu": "mikolaivska-oblast", "schedule": {}}]}
+NEW_PAYLOAD = {"date_today": "2026-02-04", "regions": [{"cpu": "kyiv", "schedule": {}}]}
+
+# Хаб відкладено зберігає кеш у .storage (таймер Store.async_delay_save)
+pytestmark = pytest.mark.parametrize("expected_lingering_timers", [True])
+
+
+class FakeResponse:
+    """Minimal aiohttp response used by SvitloApiHub._async_fetch."""
+
+    def __init__(self, body: bytes, release: asyncio.Event | None) -> None:
+        self.status = 200
+        self.headers: dict[str, str] = {}
+        self.raw_headers: tuple = ()
+        self.content_length = len(body)
+        self._body = body
+        self._release = release
+
+    async def __aenter__(self) -> FakeResponse:
+        if self._release is not None:
+            await self._release.wait()
+        return self
+
+    async def __aexit__(self, *exc) -> bool:
+        return False
+
+    async def read(self) -> bytes:
+        return self._body
+
+
+class FakeSession:
+    """Old API answers only after `release_old` is set; new API answers at once."""
+
+    def __init__(self) -> None:
+        self.release_old = asyncio.Event()
+        self.calls: Counter[str] = Counter()
+
+    def get(self, url: str, **kwargs) -> FakeResponse:
+        self.calls[url] += 1
+        if url == OLD_API_URL:
+            return FakeResponse(json.dumps(OLD_PAYLOAD).encode(), self.release_old)
+        envelope = {"body": json.dumps(NEW_PAYLOAD)}
+        return FakeResponse(json.dumps(envelope).encode(), None)
+
+
+@pytest.fixture
+async def hub(hass) -> SvitloApiHub:
+    hub = SvitloApiHub(hass)
+    hub._session = FakeSession()
+    return hub
+
+
+async def test_slow_old_api_does_not_delay_new_api(hass, hub: SvitloApiHub) -> None:
+    old_task = hass.async_create_task(hub.ensure_data(is_new=False))
+    await asyncio.sleep(0)
+
+    # Старий API "висить", а новий відповідає одразу
+    new_data = await asyncio.wait_for(hub.ensure_data(is_new=True), timeout=1)
+    assert new_data == NEW_PAYLOAD
+    assert not old_task.done()
+
+    hub._session.release_old.set()
+    assert await old_task == OLD_PAYLOAD
+
+
+async def test_concurrent_callers_share_one_request(hass, hub: SvitloApiHub) -> None:
+    waiters = [hass.async_create_task(hub.ensure_data(is_new=False)) for _ in range(5)]
+    new_data = await hub.ensure_data(is_new=True)
+    hub._session.release_old.set()
+
+    assert all(data == OLD_PAYLOAD for data in await asyncio.gather(*waiters))
+    assert new_data == NEW_PAYLOAD
+    assert hub._session.calls == {OLD_API_URL: 1, DTEK_API_URL: 1}
@@ -0,0 +1,90 @@
+"""ScheduleIndex: UTC segments of consecutive days, including DST switch days."""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.svitlo_live.schedule import (  # noqa: E402
+    STATE_OFF,
+    STATE_ON,
+    DaySchedule,
+    ScheduleIndex,
+    slot_start_utc,
+)
+
+TZ_KYIV = ZoneInfo("Europe/Kyiv")
+UTC = timezone.utc
+# Кожна година: 30 хв світло, 30 хв відключення
+ALTERNATING = DaySchedule(bytes([STATE_ON, STATE_OFF] * 24))
+
+
+def _build(day: date) -> ScheduleIndex:
+    return ScheduleIndex.build(
+        [(day, ALTERNATING), (day + timedelta(days=1), ALTERNATING)], TZ_KYIV
+    )
+
+
+@pytest.mark.parametrize(
+    ("day", "hours"),
+    [
+        (date(2026, 2, 4), 48),
+        (date(2026, 3, 29), 47),  # перехід на літній час: доба 23 год
+        (date(2026, 10, 25), 49),  # перехід на зимовий час: доба 25 год
+    ],
+)
+def test_segments_are_sorted_and_contiguous(day: date, hours: int) -> None:
+    index = _build(day)
+    segments = index.segments
+
+    assert all(seg.start < seg.end for seg in segments)
+    assert all(a.end == b.start for a, b in zip(segments, segments[1:]))
+    assert segments[-1].end - segments[0].start == timedelta(hours=hours)
+
+
+def _local(at: datetime) -> str:
+    return at.astimezone(TZ_KYIV).strftime("%H:%M")
+
+
+@pytest.mark.parametrize("day", [date(2026, 2, 4), date(2026, 3, 29), date(2026, 10, 25)])
+def test_slot_labels_are_local_wall_time(day: date) -> None:
+    # Відключення з міткою 18:00–20:00 — це 18:00–20:00 за місцевим часом
+    codes = bytes([STATE_ON] * 36 + [STATE_OFF] * 4 + [STATE_ON] * 8)
+    index = ScheduleIndex.build([(day, DaySchedule(codes))], TZ_KYIV)
+
+    (outage,) = index.intervals_of(STATE_OFF)
+    assert (_local(outage.start), _local(outage.end)) == ("18:00", "20:00")
+    # Слоти 23:00/23:30 не губляться: доба закінчується в місцеву північ
+    assert index.segments[-1].end == datetime.combine(
+        day + timedelta(days=1), datetime.min.time(), tzinfo=TZ_KYIV
+    )
+
+
+def test_spring_forward_skips_missing_hour() -> None:
+    midnight = datetime(2026, 3, 29, tzinfo=TZ_KYIV)
+
+    # 03:00 і 03:30 не існують — мітки зсуваються на момент переходу (04:00)
+    assert [_local(slot_start_utc(midnight, idx)) for idx in range(4, 10)] == [
+        "02:00", "02:30", "04:00", "04:00", "04:00", "04:30",
+    ]
+    assert slot_start_utc(midnight, 48) == datetime(2026, 3, 29, 21, 0, tzinfo=UTC)
+
+    index = _build(date(2026, 3, 29))
+    at = datetime(2026, 3, 29, 4, 10, tzinfo=TZ_KYIV)
+    assert index.state_at(at) == "on"
+    assert index.next_at(STATE_OFF, at) == datetime(2026, 3, 29, 4, 30, tzinfo=TZ_KYIV)
+    assert index.next_change(at) == datetime(2026, 3, 29, 4, 30, tzinfo=TZ_KYIV)
+
+
+def test_fall_back_keeps_repeated_hour_in_order() -> None:
+    midnight = datetime(2026, 10, 25, tzinfo=TZ_KYIV)
+    starts = [slot_start_utc(midnight, idx) for idx in range(49)]
+
+    assert starts == sorted(starts)
+    # Повторювана година 03:00–04:00: мітки беруться з першого проходу (літній час)
+    assert starts[6] == datetime(2026, 10, 25, 0, 0, tzinfo=UTC)
+    assert starts[8] == datetime(2026, 10, 25, 2, 0, tzinfo=UTC)
+    assert [_local(at) for at in starts[36:41:4]] == ["18:00", "20:00"]